@@ -0,0 +1,113 @@
+"""Compare the generated evaluator kernel with the generic HandCalculator and
+WinCalculator path on the same random seven card hands, then the kernel's
+showdown with valuing each hand and settling the winners in Python, on the
+same random six player showdowns.
+
+Both paths are checked to give the same result every time before they're
+timed. Reports hands, or showdowns, per second by each path and the speedup.
+
+Run from the repository root after installing the package:
+
+    $ python benchmarks/evaluator_kernel.py
+"""
+import platform
+import random
+import time
+
+from poker_win_calculator.game_objects import CARDS, Player
+from poker_win_calculator.hand_calculator import HandCalculator
+from poker_win_calculator.kernel import load_kernel
+from poker_win_calculator.rulesets import SHORT_DECK, STANDARD
+from poker_win_calculator.win_calculator import WinCalculator
+
+HANDS = 50000
+SHOWDOWNS = 10000
+PLAYERS = 6
+REPEATS = 3
+
+
+def best_rate(evaluate, hands: list) -> float:
+    """Return the best hands per second over REPEATS runs."""
+    best = 0.0
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for cards in hands:
+            evaluate(cards)
+        best = max(best, len(hands) / (time.perf_counter() - start))
+    return best
+
+
+def print_rates(name: str, generic_rate: float, kernel_rate: float):
+    print(
+        f"{name:<20}{generic_rate:>12,.0f}{kernel_rate:>12,.0f}"
+        f"{kernel_rate / generic_rate:>9.1f}x"
+    )
+
+
+def compare_hands():
+    print(f"{'Hands':<20}{'generic/s':>12}{'kernel/s':>12}{'speedup':>10}")
+    for ruleset in (STANDARD, SHORT_DECK):
+        rng = random.Random(0)
+        deck = [card for card in CARDS if card.rank in ruleset.rank_values]
+        hands = [rng.sample(deck, 7) for _ in range(HANDS)]
+
+        calculator = HandCalculator([], Player(0), ruleset)
+        rank_types = ruleset.rank_types
+
+        def generic(cards: list) -> tuple:
+            hands = calculator.get_hands(cards)
+            return WinCalculator.hand_value(hands, rank_types)
+
+        kernel = load_kernel(ruleset).evaluate_cards
+        for cards in hands:
+            if generic(cards) != kernel(cards):
+                raise AssertionError(f"Values differ for {cards}")
+
+        print_rates(
+            ruleset.name, best_rate(generic, hands), best_rate(kernel, hands))
+
+
+def compare_showdowns():
+    print(f"{'Showdowns':<20}{'python/s':>12}{'kernel/s':>12}{'speedup':>10}")
+    for ruleset in (STANDARD, SHORT_DECK):
+        rng = random.Random(0)
+        deck = [card.card_int for card in CARDS
+                if card.rank in ruleset.rank_values]
+        showdowns = []
+        for _ in range(SHOWDOWNS):
+            dealt = rng.sample(deck, 2 * PLAYERS + 5)
+            holes = [tuple(dealt[2 * i:2 * i + 2]) for i in range(PLAYERS)]
+            showdowns.append((holes, dealt[-5:]))
+
+        kernel = load_kernel(ruleset)
+        evaluate = kernel.evaluate
+
+        def python(showdown: tuple) -> tuple:
+            holes, board = showdown
+            values = [evaluate(a, b, *board) for a, b in holes]
+            best = max(values)
+            winners = [i for i, v in enumerate(values) if v == best]
+            return winners, values
+
+        def generated(showdown: tuple) -> tuple:
+            return kernel.showdown(*showdown)
+
+        for showdown in showdowns:
+            if python(showdown) != generated(showdown):
+                raise AssertionError(f"Results differ for {showdown}")
+
+        print_rates(
+            ruleset.name,
+            best_rate(python, showdowns),
+            best_rate(generated, showdowns),
+        )
+
+
+def main():
+    print(f"{platform.python_implementation()} {platform.python_version()}")
+    compare_hands()
+    compare_showdowns()
+
+
+if __name__ == "__main__":
+    main()
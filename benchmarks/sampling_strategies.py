@@ -0,0 +1,79 @@
+"""Compare the accuracy of each equity sampling strategy with plain sampling
+at the same cost.
+
+Each strategy estimates a spot's equity many times over with the same number
+of showdown evaluations, and the root mean squared error of those estimates
+against the reference equity is reported. Efficiency is how many times more
+evaluations plain sampling would need to be as accurate, (plain error /
+strategy error) squared.
+
+Run from the repository root after installing the package:
+
+    $ python benchmarks/sampling_strategies.py
+"""
+import time
+from math import sqrt
+
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import Card
+from poker_win_calculator.monte_carlo import SAMPLERS, EquitySampler
+
+EVALUATIONS = 2000
+REPEATS = 40
+
+
+def cards(s: str) -> list:
+    return [Card.from_str(c) for c in s.split()]
+
+
+def reference_equity(holes, board, random_opponents) -> float:
+    """Return the hero's exact equity if every runout can be enumerated,
+    otherwise a long plain sampling run."""
+    if not random_opponents and len(board) >= 3:
+        return Evaluator().equity(holes, board)[0]
+    sampler = EquitySampler(holes, board, random_opponents, seed=0)
+    return sampler.run(target_error=0.001, batch_size=20000).equities[0]
+
+
+SPOTS = [
+    ("AsKs vs QdQc, flop", cards("AS KS"), cards("QD QC"), "JS 7S 2H", 0),
+    ("AsKs vs QdQc, preflop", cards("AS KS"), cards("QD QC"), "", 0),
+    ("AsKs vs 3 random, preflop", cards("AS KS"), None, "", 3),
+    ("9h8h vs 2 random, flop", cards("9H 8H"), None, "7H 6C 2D", 2),
+]
+
+
+def main():
+    for name, hero, villain, board, random_opponents in SPOTS:
+        board = cards(board) if board else []
+        holes = [hero] + ([villain] if villain else [])
+        reference = reference_equity(holes, board, random_opponents)
+        print(f"\n{name}: equity {reference:.4f}")
+        print(f"  {'Strategy':<15}{'RMSE':>9}{'Efficiency':>12}{'Time':>9}")
+
+        plain_error = None
+        for strategy, sampler_class in SAMPLERS.items():
+            errors = []
+            start = time.monotonic()
+            try:
+                for seed in range(REPEATS):
+                    sampler = sampler_class(
+                        holes, board, random_opponents, seed=seed + 1)
+                    sampler.sample_batch(EVALUATIONS)
+                    equity = sampler.estimate().equities[0]
+                    errors.append((equity - reference) ** 2)
+            except ValueError:
+                # The strategy doesn't apply to this street
+                continue
+            elapsed = (time.monotonic() - start) / REPEATS
+            rmse = sqrt(sum(errors) / len(errors))
+            plain_error = plain_error or rmse
+            efficiency = (plain_error / rmse) ** 2 if rmse else float("inf")
+            print(
+                f"  {strategy:<15}{rmse:>9.4f}{efficiency:>11.1f}x"
+                f"{elapsed:>8.2f}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
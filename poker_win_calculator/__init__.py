@@ -1,25 +1,65 @@
+from .anytime_equity import AnytimeEquity, BackgroundEquity, equity_within
+
+from .board_index import BoardIndex
+
+from .category_stats import CategoryStats, category_stats
+
 from .cli import CardSelector, CLI
 
 from .game_objects import (
+        CARDS,
         Card,
         Dealer,
         Deck,
         Player,
 )
 
+from .equity_matrix import ComboTable, EquityMatrix, EquityMatrixGenerator
+
+from .evaluator import Evaluator
+
 from .hand_calculator import HandCalculator
 
+from .hand_history import HandHistoryReader, HandHistoryWriter, HandResult
+
+from .hand_store import HandHistoryStore, starting_hand_class
+
 from .helpers import (
+    CARD_INTS,
+    CARD_STRS,
     all_card_combos,
     all_in,
     clear,
     debug_print,
+    format_cards,
     key_input,
     line_break,
     none_in,
+    parse_card,
+    parse_cards,
     print_centre,
     print_lm,
     quit_cli,
 )
 
+from .monte_carlo import (
+    EquityEstimate,
+    EquitySampler,
+    StratifiedSampler,
+    TextureSampler,
+    adaptive_equity,
+)
+
+from .outs import OutsCalculator, OutsReport
+
+from .renderer import Renderer
+
+from .round_log import LoggedRound, RoundLogReader, RoundLogWriter
+
+from .rulesets import Ruleset, SHORT_DECK, STANDARD
+
+from .shared_tally import SharedTally
+
+from .simulator import SimulationTally, TournamentSimulator
+
 from .win_calculator import WinCalculator
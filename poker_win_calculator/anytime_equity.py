@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from itertools import combinations
+from math import comb, sqrt
+from random import Random
+
+from poker_win_calculator.game_objects import CARDS
+from poker_win_calculator.monte_carlo import EquityEstimate, EquitySampler
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# Runouts settled between checks of the clock
+CHECK_EVERY = 32
+
+
+class AnytimeEquity:
+    """Works out each seat's equity in slices of time, with an estimate
+    available after any slice.
+
+    With no random opponents and at most exact_limit runouts, every runout is
+    enumerated, in a random order, so the equity is exact once they've all
+    been settled, and before then the runouts so far are a random sample
+    without replacement, whose standard error shrinks to zero as the
+    enumeration finishes. Otherwise runouts are sampled by an EquitySampler,
+    with the standard error it reports."""
+
+    def __init__(
+        self,
+        holes: list,
+        board: list = (),
+        random_opponents: int = 0,
+        dead_cards: list = (),
+        seed: int = None,
+        ruleset: Ruleset = STANDARD,
+        exact_limit: int = 200000,
+    ):
+        self.sampler = EquitySampler(
+            holes, board, random_opponents, dead_cards, seed, ruleset)
+        self.n_seats = self.sampler.n_seats
+        deck = self.sampler.deck
+        self.total = comb(len(deck), self.sampler.board_needed)
+        self.exact = not random_opponents and self.total <= exact_limit
+
+        self.runouts = []
+        if self.exact:
+            self.runouts = list(combinations(
+                deck.live_ints(), self.sampler.board_needed))
+            Random(seed).shuffle(self.runouts)
+        self.settled = 0
+        self.sums = [0.0] * self.n_seats
+        self.sums_sq = [0.0] * self.n_seats
+        self.elapsed = 0.0
+
+    @property
+    def done(self) -> bool:
+        """Whether every runout has been enumerated."""
+        return self.exact and self.settled == self.total
+
+    def enumerate_until(self, deadline: float):
+        """Settle runouts in their random order until the deadline, a
+        time.monotonic() value, or until every runout is settled."""
+        sampler = self.sampler
+        holes, board = sampler.holes, sampler.board
+        showdown = sampler.evaluator.showdown
+        sums, sums_sq = self.sums, self.sums_sq
+        while self.settled < self.total and time.monotonic() < deadline:
+            stop = min(self.settled + CHECK_EVERY, self.total)
+            for runout in self.runouts[self.settled:stop]:
+                winners, _ = showdown(
+                    holes, board + [CARDS[c] for c in runout])
+                share = 1 / len(winners)
+                for seat in winners:
+                    sums[seat] += share
+                    sums_sq[seat] += share * share
+            self.settled = stop
+
+    def refine(self, deadline: float):
+        """Improve the estimate until the deadline, a time.monotonic()
+        value."""
+        start = time.monotonic()
+        if self.exact:
+            self.enumerate_until(deadline)
+        else:
+            while time.monotonic() < deadline:
+                self.sampler.sample_batch(CHECK_EVERY)
+        self.elapsed += time.monotonic() - start
+
+    def estimate(self, target_error: float = 0.0) -> EquityEstimate:
+        """Return the estimate so far. converged is True once the equity is
+        exact or every standard error is at most target_error."""
+        if not self.exact:
+            estimate = self.sampler.estimate()
+            converged = max(estimate.std_errors) <= target_error
+            return estimate._replace(
+                elapsed=self.elapsed, converged=converged)
+
+        n = max(self.settled, 1)
+        if self.done:
+            errors = [0.0] * self.n_seats
+        elif self.settled < 2:
+            errors = [1.0] * self.n_seats
+        else:
+            # Sampling without replacement from the runouts, so the error
+            # is scaled down by the share of runouts left
+            fpc = (self.total - n) / (self.total - 1)
+            errors = []
+            for total, total_sq in zip(self.sums, self.sums_sq):
+                mean = total / n
+                variance = max(total_sq / n - mean * mean, 0.0) * n / (n - 1)
+                errors.append(sqrt(variance / n * fpc))
+        return EquityEstimate(
+            equities=[total / n for total in self.sums],
+            std_errors=errors,
+            trials=self.settled,
+            evaluations=self.settled,
+            elapsed=self.elapsed,
+            exact=self.done,
+            converged=self.done or max(errors) <= target_error,
+        )
+
+
+def equity_within(
+    holes: list,
+    board: list = (),
+    random_opponents: int = 0,
+    dead_cards: list = (),
+    time_budget: float = 0.02,
+    seed: int = None,
+    ruleset: Ruleset = STANDARD,
+) -> EquityEstimate:
+    """Return the best estimate of each seat's equity available within the
+    time budget in seconds: exact if every runout could be enumerated in
+    time, otherwise sampled, with its standard error. The budget includes
+    setting up, so call it with a little to spare for a hard deadline."""
+    deadline = time.monotonic() + time_budget
+    calculator = AnytimeEquity(
+        holes, board, random_opponents, dead_cards, seed, ruleset)
+    calculator.refine(deadline)
+    return calculator.estimate()
+
+
+class BackgroundEquity:
+    """Keeps refining an AnytimeEquity in a background thread and publishes
+    the estimate after every slice of interval seconds, to callbacks and to
+    async iterators (see updates). Stops when the equity is exact, every
+    standard error is at most target_error, or stop() is called.
+
+    The thread runs Python code, so it shares the interpreter with the
+    caller; a short interval keeps the caller responsive."""
+
+    def __init__(
+        self,
+        calculator: AnytimeEquity,
+        callback=None,
+        interval: float = 0.02,
+        target_error: float = 0.001,
+    ):
+        self.calculator = calculator
+        self.interval = interval
+        self.target_error = target_error
+        self.callbacks = [callback] if callback else []
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.latest = None
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def subscribe(self, callback):
+        """Call callback(estimate, final) with every estimate published from
+        now on. final is True for the last one."""
+        with self.lock:
+            self.callbacks.append(callback)
+
+    def publish(self, estimate: EquityEstimate, final: bool):
+        with self.lock:
+            self.latest = estimate
+            callbacks = list(self.callbacks)
+        for callback in callbacks:
+            callback(estimate, final)
+
+    def run(self):
+        """Refine and publish until converged or stopped."""
+        while not self.stopping.is_set():
+            self.calculator.refine(time.monotonic() + self.interval)
+            estimate = self.calculator.estimate(self.target_error)
+            final = estimate.converged or self.stopping.is_set()
+            self.publish(estimate, final)
+            if final:
+                return
+        self.publish(self.calculator.estimate(self.target_error), True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop refining after the current slice, and wait for it."""
+        self.stopping.set()
+        if self.thread.is_alive():
+            self.thread.join()
+
+    @property
+    def running(self) -> bool:
+        return self.thread.is_alive()
+
+    async def updates(self):
+        """Yield each estimate as it's published, until the final one.
+        Starts the thread if it isn't running yet."""
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def put(estimate: EquityEstimate, final: bool):
+            loop.call_soon_threadsafe(queue.put_nowait, (estimate, final))
+
+        self.subscribe(put)
+        if not self.thread.is_alive() and self.latest is None:
+            self.start()
+        elif not self.thread.is_alive():
+            # Already finished, so the latest estimate is the final one
+            put(self.latest, True)
+        while True:
+            estimate, final = await queue.get()
+            yield estimate
+            if final:
+                return
@@ -0,0 +1,239 @@
+import json
+from array import array
+from itertools import combinations
+from math import comb
+
+from poker_win_calculator.game_objects import CARDS, Card, Deck, Player
+from poker_win_calculator.hand_calculator import HandCalculator
+from poker_win_calculator.helpers import parse_cards
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# Texture features of a board, each stored as one byte per board:
+#   paired, trips: the board has a pair, or three of a kind
+#   suits: the number of different suits, and max_suit the most of one suit
+#   monotone, two_tone, rainbow: one suit, two suits, or no two cards suited
+#   flush_possible: two suited hole cards can make a flush
+#   straight_possible: two hole cards can make a straight
+#   straight_combos: the number of hole card rank pairs that make a straight
+#   connectedness: the most board ranks inside one straight
+#   broadway: the number of cards ranked Ten or higher
+#   high_rank: the highest rank on the board
+FEATURES = (
+    "paired",
+    "trips",
+    "suits",
+    "max_suit",
+    "monotone",
+    "two_tone",
+    "rainbow",
+    "flush_possible",
+    "straight_possible",
+    "straight_combos",
+    "connectedness",
+    "broadway",
+    "high_rank",
+)
+
+
+class BoardIndex:
+    """Every flop (or every turn) of a deck with its texture features, worked
+    out once with the HandCalculator checks and kept in compact arrays.
+
+    Boards are numbered in colexicographic order of their card ints, so the
+    number of any board is calculated directly (see index_of). For each
+    value of each feature there is a bitset of the boards with that value, so
+    a query is a few big int operations, e.g. all monotone flops with a
+    broadway card:
+
+        BoardIndex().filter(monotone=True, broadway=lambda n: n > 0)"""
+
+    def __init__(self, size: int = 3, ruleset: Ruleset = STANDARD):
+        if size not in (3, 4):
+            raise ValueError("Boards are flops (3 cards) or turns (4 cards)")
+        self.size = size
+        self.ruleset = ruleset
+        self.first = Deck(ruleset).first
+        # A HandCalculator with no cards of its own, used only for its checks
+        self.calculator = HandCalculator([], Player(0), ruleset)
+        self.boards = array("B")
+        self.features = {name: array("B") for name in FEATURES}
+        self.bitsets = {}
+
+    def __len__(self):
+        return len(self.boards) // self.size
+
+    def __repr__(self):
+        return f"BoardIndex({len(self)} boards of {self.size} cards)"
+
+    def build(self):
+        """Work out the features of every board and index them."""
+        cards = Deck(self.ruleset).live_ints()
+        boards = sorted(combinations(cards, self.size), key=lambda b: b[::-1])
+        straights = {}
+        for board in boards:
+            self.boards.extend(board)
+            texture = self.board_texture([CARDS[c] for c in board], straights)
+            for name in FEATURES:
+                self.features[name].append(texture[name])
+        self.index_features()
+        return self
+
+    def straight_features(self, mask: int) -> tuple:
+        """Return (straight_combos, connectedness) of a board's rank mask."""
+        table = self.ruleset.straight_table
+        bits = [1 << (rank - 2) for rank in self.ruleset.rank_values]
+        combos = 0
+        for i, first in enumerate(bits):
+            for second in bits[i:]:
+                if table[mask | first | second]:
+                    combos += 1
+        # Every straight is a run of five ranks, or the wheel
+        rank_values = self.ruleset.rank_values
+        windows = [rank_values[i:i + 5] for i in range(len(rank_values) - 4)]
+        windows.append([14] + rank_values[:4])
+        connectedness = max(
+            sum(1 for rank in window if mask >> (rank - 2) & 1)
+            for window in windows
+        )
+        return combos, connectedness
+
+    def board_texture(self, cards: list, straights: dict = None) -> dict:
+        """Return the features of a board of Cards. Straight features depend
+        only on the ranks, so they can be cached in straights by rank mask."""
+        calculator = self.calculator
+        matches = calculator.matches_check(cards)
+        mask = calculator.rank_mask(cards)
+        if straights is None:
+            straights = {}
+        if mask not in straights:
+            straights[mask] = self.straight_features(mask)
+        straight_combos, connectedness = straights[mask]
+
+        suit_counts = {}
+        for card in cards:
+            suit_counts[card.suit] = suit_counts.get(card.suit, 0) + 1
+        suits = len(suit_counts)
+        max_suit = max(suit_counts.values())
+        return {
+            "paired": bool(matches),
+            "trips": max(matches.values(), default=0) >= 3,
+            "suits": suits,
+            "max_suit": max_suit,
+            "monotone": suits == 1,
+            "two_tone": suits == 2,
+            "rainbow": suits == len(cards),
+            # Two suited hole cards make five of a suit with three on board
+            "flush_possible": max_suit >= 3,
+            "straight_possible": straight_combos > 0,
+            "straight_combos": straight_combos,
+            "connectedness": connectedness,
+            "broadway": sum(1 for card in cards if card.rank >= 10),
+            "high_rank": max(card.rank for card in cards),
+        }
+
+    def index_features(self):
+        """Build the bitset of boards for each value of each feature."""
+        n_bytes = (len(self) + 7) // 8
+        self.bitsets = {}
+        for name, values in self.features.items():
+            buffers = {}
+            for i, value in enumerate(values):
+                if value not in buffers:
+                    buffers[value] = bytearray(n_bytes)
+                buffers[value][i >> 3] |= 1 << (i & 7)
+            self.bitsets[name] = {
+                value: int.from_bytes(buffer, "little")
+                for value, buffer in buffers.items()
+            }
+
+    def index_of(self, cards) -> int:
+        """Return the number of a board given as Cards, card ints or a string
+        like "AsKdTh"."""
+        if isinstance(cards, str):
+            cards = parse_cards(cards)
+        card_ints = sorted(
+            c.card_int if isinstance(c, Card) else c for c in cards)
+        if len(set(card_ints)) != self.size:
+            raise ValueError(f"A board must be {self.size} different cards")
+        if card_ints[0] < self.first:
+            raise ValueError(f"{cards} isn't in the {self.ruleset.name} deck")
+        return sum(
+            comb(card_int - self.first, k + 1)
+            for k, card_int in enumerate(card_ints)
+        )
+
+    def board(self, index: int) -> list:
+        """Return the Cards of the board with a number."""
+        start = index * self.size
+        return [CARDS[c] for c in self.boards[start:start + self.size]]
+
+    def texture(self, cards) -> dict:
+        """Return the stored features of a board."""
+        i = self.index_of(cards)
+        return {name: values[i] for name, values in self.features.items()}
+
+    def query(self, **conditions) -> int:
+        """Return the bitset of boards meeting every condition. A condition is
+        a feature name with a value, a collection of values, or a function
+        that returns True for the values wanted."""
+        result = (1 << len(self)) - 1
+        for name, condition in conditions.items():
+            if name not in self.bitsets:
+                raise ValueError(f"Unknown board feature: {name}")
+            if callable(condition):
+                wanted = [v for v in self.bitsets[name] if condition(v)]
+            elif isinstance(condition, (list, tuple, set, frozenset, range)):
+                wanted = condition
+            else:
+                wanted = [condition]
+            bits = 0
+            for value in wanted:
+                bits |= self.bitsets[name].get(int(value), 0)
+            result &= bits
+        return result
+
+    def filter(self, **conditions) -> list:
+        """Return the numbers of the boards meeting every condition (see
+        query)."""
+        bits = self.query(**conditions)
+        n_bytes = (len(self) + 7) // 8
+        indexes = []
+        for i, byte in enumerate(bits.to_bytes(n_bytes, "little")):
+            while byte:
+                low = byte & -byte
+                indexes.append(8 * i + low.bit_length() - 1)
+                byte ^= low
+        return indexes
+
+    def count(self, **conditions) -> int:
+        """Return the number of boards meeting every condition."""
+        return bin(self.query(**conditions)).count("1")
+
+    def save(self, path: str):
+        """Write the boards and features to a file, a line of JSON followed
+        by the raw arrays, so the index can be loaded without rebuilding it."""
+        header = {
+            "size": self.size,
+            "ruleset": self.ruleset.name,
+            "boards": len(self),
+            "features": list(FEATURES),
+        }
+        with open(path, "wb") as f:
+            f.write(json.dumps(header).encode() + b"\n")
+            self.boards.tofile(f)
+            for name in FEATURES:
+                self.features[name].tofile(f)
+
+    @classmethod
+    def load(cls, path: str, ruleset: Ruleset = STANDARD):
+        """Return a BoardIndex from a file written by save()."""
+        with open(path, "rb") as f:
+            header = json.loads(f.readline())
+            if header["ruleset"] != ruleset.name:
+                raise ValueError(f"{path} isn't a {ruleset.name} board index")
+            index = cls(header["size"], ruleset)
+            index.boards.fromfile(f, header["boards"] * header["size"])
+            for name in header["features"]:
+                index.features[name].fromfile(f, header["boards"])
+        index.index_features()
+        return index
@@ -0,0 +1,241 @@
+from itertools import combinations
+from math import factorial
+from multiprocessing import Pool
+from random import Random
+
+from poker_win_calculator.chunked_runs import chunk_seed
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import CARDS, Deck, sample_live
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+
+class CategoryStats:
+    """Counts how often each of the WinCalculator's rank types is a player's
+    highest hand, wins outright, splits the pot, and loses to each other rank
+    type. The counters are a fixed size however many rounds are counted, and
+    counts from separate workers are combined with merge()."""
+
+    def __init__(self, rank_types: list = STANDARD.rank_types):
+        self.rank_types = list(rank_types)
+        n = len(self.rank_types)
+        self.rounds = 0
+        self.occurs = [0] * n
+        self.wins = [0] * n
+        self.splits = [0] * n
+        # loses_to[loser][winner], by index in rank_types
+        self.loses_to = [[0] * n for _ in range(n)]
+
+    def __repr__(self):
+        return f"CategoryStats({self.rounds} rounds)"
+
+    def add_round(self, categories: list, winners: list):
+        """Count a round from the rank_types index of each player's highest
+        hand and the indexes of the winning player(s)."""
+        self.rounds += 1
+        winning = categories[winners[0]]
+        for i, category in enumerate(categories):
+            self.occurs[category] += 1
+            if i not in winners:
+                self.loses_to[category][winning] += 1
+        if len(winners) > 1:
+            self.splits[winning] += len(winners)
+        else:
+            self.wins[winning] += 1
+
+    def merge(self, other):
+        """Add the counts of another CategoryStats to this one."""
+        n = len(self.rank_types)
+        self.rounds += other.rounds
+        for i in range(n):
+            self.occurs[i] += other.occurs[i]
+            self.wins[i] += other.wins[i]
+            self.splits[i] += other.splits[i]
+            for j in range(n):
+                self.loses_to[i][j] += other.loses_to[i][j]
+        return self
+
+    def to_dict(self) -> dict:
+        """Return the counts as a dict that can be saved as JSON."""
+        return {
+            "rank_types": self.rank_types,
+            "rounds": self.rounds,
+            "occurs": self.occurs,
+            "wins": self.wins,
+            "splits": self.splits,
+            "loses_to": self.loses_to,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Return a CategoryStats from the dict made by to_dict()."""
+        stats = cls(data["rank_types"])
+        stats.rounds = data["rounds"]
+        stats.occurs = list(data["occurs"])
+        stats.wins = list(data["wins"])
+        stats.splits = list(data["splits"])
+        stats.loses_to = [list(row) for row in data["loses_to"]]
+        return stats
+
+    def frequency(self, rank_type: str) -> float:
+        """Return the share of all hands that were this rank type."""
+        hands = sum(self.occurs)
+        occurs = self.occurs[self.rank_types.index(rank_type)]
+        return occurs / hands if hands else 0.0
+
+    def win_rate(self, rank_type: str) -> float:
+        """Return how often a hand of this rank type won outright."""
+        i = self.rank_types.index(rank_type)
+        return self.wins[i] / self.occurs[i] if self.occurs[i] else 0.0
+
+    def split_rate(self, rank_type: str) -> float:
+        """Return how often a hand of this rank type split the pot."""
+        i = self.rank_types.index(rank_type)
+        return self.splits[i] / self.occurs[i] if self.occurs[i] else 0.0
+
+    def loses_to_rate(self, loser: str, winner: str) -> float:
+        """Return how often a hand of rank type loser lost to a winning hand
+        of rank type winner, e.g. a Flush losing to a Full House."""
+        i = self.rank_types.index(loser)
+        j = self.rank_types.index(winner)
+        return self.loses_to[i][j] / self.occurs[i] if self.occurs[i] else 0.0
+
+    def report(self) -> str:
+        """Return a table of each rank type's frequency, win and split rate."""
+        lines = [f"{'Hand':<16}{'Freq':>9}{'Wins':>9}{'Splits':>9}"]
+        for rank_type in self.rank_types:
+            lines.append(
+                f"{rank_type:<16}"
+                f"{self.frequency(rank_type):>9.2%}"
+                f"{self.win_rate(rank_type):>9.2%}"
+                f"{self.split_rate(rank_type):>9.2%}"
+            )
+        return "\n".join(lines)
+
+
+def n_choose_k(n: int, k: int) -> int:
+    """Return the number of ways to choose k items from n."""
+    return factorial(n) // (factorial(k) * factorial(n - k))
+
+
+def count_deals(remaining: int, board_needed: int, random_players: int):
+    """Return the number of distinct ways to deal the missing board cards and
+    the hole cards of the players without fixed cards."""
+    deals = n_choose_k(remaining, board_needed)
+    remaining -= board_needed
+    for _ in range(random_players):
+        deals *= n_choose_k(remaining, 2)
+        remaining -= 2
+    return deals
+
+
+def hole_deals(cards: list, players: int):
+    """Yield every way to deal two cards each to a number of players."""
+    if players == 0:
+        yield ()
+        return
+    for hole in combinations(cards, 2):
+        rest = [card for card in cards if card not in hole]
+        for others in hole_deals(rest, players - 1):
+            yield (list(hole),) + others
+
+
+def add_showdown(stats: CategoryStats, evaluator: Evaluator, holes, board):
+    """Evaluate a showdown and count it in stats."""
+    winners, values = evaluator.showdown(holes, board)
+    n = len(evaluator.rank_types)
+    stats.add_round([n - value[0] for value in values], winners)
+
+
+def enumerate_stats(
+    n_players: int, holes: list, board: list, dead_cards: list,
+    ruleset: Ruleset
+) -> CategoryStats:
+    """Return exact CategoryStats over every possible deal of the unknown
+    cards."""
+    evaluator = Evaluator(ruleset)
+    stats = CategoryStats(ruleset.rank_types)
+    known = [card for hole in holes for card in hole] + board + dead_cards
+    remaining = evaluator.remaining_cards(known)
+
+    for runout in combinations(remaining, 5 - len(board)):
+        rest = [card for card in remaining if card not in runout]
+        full_board = board + list(runout)
+        for dealt in hole_deals(rest, n_players - len(holes)):
+            add_showdown(stats, evaluator, holes + list(dealt), full_board)
+    return stats
+
+
+def simulate_stats(args: tuple) -> CategoryStats:
+    """Return CategoryStats for a chunk of random rounds."""
+    n_players, holes, board, dead_cards, rounds, seed, ruleset = args
+    rng = Random(seed)
+    evaluator = Evaluator(ruleset)
+    stats = CategoryStats(ruleset.rank_types)
+    known = [card for hole in holes for card in hole] + board + dead_cards
+    deck = Deck(ruleset, known)
+    board_needed = 5 - len(board)
+    random_players = n_players - len(holes)
+    n_dealt = board_needed + 2 * random_players
+
+    for _ in range(rounds):
+        dealt = sample_live(deck.live, n_dealt, rng, deck.first)
+        dealt = [CARDS[card_int] for card_int in dealt]
+        full_board = board + dealt[:board_needed]
+        round_holes = holes + [
+            dealt[i:i + 2] for i in range(board_needed, len(dealt), 2)
+        ]
+        add_showdown(stats, evaluator, round_holes, full_board)
+    return stats
+
+
+def category_stats(
+    n_players: int,
+    holes: list = (),
+    board: list = (),
+    dead_cards: list = (),
+    rounds: int = 100000,
+    exact_limit: int = 100000,
+    processes: int = 1,
+    chunk_size: int = 10000,
+    seed: int = None,
+    ruleset: Ruleset = STANDARD,
+) -> CategoryStats:
+    """Return CategoryStats for rounds of n_players, where the first players
+    may have fixed hole cards and the board may have fixed cards. Dead cards
+    are never dealt.
+
+    If there are no more than exact_limit possible deals of the unknown cards
+    they are all counted exactly. Otherwise the given number of random rounds
+    are simulated in chunks, spread over a number of processes, and each
+    chunk's counts are merged as it finishes."""
+    holes = [list(hole) for hole in holes]
+    board = list(board)
+    dead_cards = list(dead_cards)
+    if not 1 <= n_players <= 9 or len(holes) > n_players:
+        raise ValueError("There must be 1-9 players, including fixed holes")
+
+    known = [card for hole in holes for card in hole] + board + dead_cards
+    deals = count_deals(
+        len(Deck(ruleset, known)), 5 - len(board), n_players - len(holes))
+    if deals <= exact_limit:
+        return enumerate_stats(n_players, holes, board, dead_cards, ruleset)
+
+    # Chunks are generated as they're needed, so only the counts of chunks in
+    # flight are held in memory however many rounds are simulated
+    chunks = (
+        (
+            n_players, holes, board, dead_cards, min(chunk_size, rounds - i),
+            None if seed is None else chunk_seed(seed, i), ruleset,
+        )
+        for i in range(0, rounds, chunk_size)
+    )
+
+    stats = CategoryStats(ruleset.rank_types)
+    if processes == 1:
+        for chunk in chunks:
+            stats.merge(simulate_stats(chunk))
+        return stats
+    with Pool(processes) as pool:
+        for chunk_stats in pool.imap_unordered(simulate_stats, chunks):
+            stats.merge(chunk_stats)
+    return stats
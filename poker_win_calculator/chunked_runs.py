@@ -0,0 +1,128 @@
+"""Helpers shared by the runs that are split into chunks and spread across
+processes: the TournamentSimulator, the EquityMatrixGenerator and
+category_stats.
+
+Each chunk has its own seed derived from the run's seed, so a run gives the
+same result however many processes it's split over. The functions mapped
+over a process Pool take a single tuple of arguments, as Pool.imap does.
+
+A checkpoint is a line of JSON with the run's settings, the finished chunk
+ids and any other state of the driver, then any raw data the driver writes
+after it. A run only resumes from a checkpoint saved with the same
+settings."""
+import json
+import os
+import time
+
+from poker_win_calculator.rulesets import Ruleset
+
+
+def chunk_seed(seed: int, chunk: int) -> int:
+    """Return the seed of a chunk of a run."""
+    return seed * 1000003 + chunk
+
+
+def unfinished_chunks(total: int, chunk_size: int, seed: int, done: set):
+    """Return (chunk id, size, seed) for each chunk of a run of total items
+    that isn't in the set of finished chunk ids."""
+    chunks = []
+    for i, start in enumerate(range(0, total, chunk_size)):
+        if i not in done:
+            chunks.append(
+                (i, min(chunk_size, total - start), chunk_seed(seed, i)))
+    return chunks
+
+
+def write_atomic(path: str, write):
+    """Call write with a binary file to write a checkpoint, writing to a
+    temporary file and moving it into place, so an interrupted write never
+    leaves a broken checkpoint."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+def run_settings(
+    chunk_size: int, seed: int, ruleset: Ruleset, **settings
+) -> dict:
+    """Return the settings a checkpoint must match to be resumed: the
+    chunking, seed and ruleset of the run, and the driver's own settings,
+    such as the number of items to run."""
+    return {
+        **settings,
+        "chunk_size": chunk_size,
+        "seed": seed,
+        "ruleset": ruleset.name,
+    }
+
+
+def load_checkpoint(path: str, settings: dict, read_data=None) -> tuple:
+    """Return (state, data) from the checkpoint at path, or (None, None) if
+    there is no checkpoint to resume. state is the dict given to
+    save_checkpoint, with "done" as a set of chunk ids, and data is what
+    read_data returns when called with the file after the JSON line. Raises
+    ValueError if the checkpoint was saved with different settings."""
+    if not path or not os.path.exists(path):
+        return None, None
+    with open(path, "rb") as f:
+        state = json.loads(f.readline())
+        if state.pop("settings") != settings:
+            raise ValueError(f"Checkpoint {path} is for a different run")
+        data = read_data(f) if read_data else None
+    state["done"] = set(state["done"])
+    return state, data
+
+
+def save_checkpoint(
+    path: str, settings: dict, done: set, state: dict, write_data=None
+):
+    """Write a checkpoint atomically (see write_atomic): the settings, the
+    finished chunk ids and the driver's state as a line of JSON, then
+    whatever write_data writes when called with the file."""
+    line = {"settings": settings, "done": sorted(done), **state}
+
+    def write(f):
+        f.write(json.dumps(line).encode() + b"\n")
+        if write_data:
+            write_data(f)
+
+    write_atomic(path, write)
+
+
+def print_progress(
+    done: int, total: int, rate: float, unit: str = "hands", digits: int = 0
+):
+    """Print the progress of a run on one line."""
+    print(
+        f"\r{done:,}/{total:,} {unit} ({rate:,.{digits}f} {unit}/s)",
+        end="" if done < total else "\n",
+        flush=True,
+    )
+
+
+class ChunkClock:
+    """Times a run as its chunks finish: reports the progress and rate since
+    the run started, excluding the items resumed from a checkpoint, and says
+    when a checkpoint is due."""
+
+    def __init__(
+        self, total: int, resumed: int, interval: float, progress=None
+    ):
+        self.total = total
+        self.resumed = resumed
+        self.interval = interval
+        self.progress = progress
+        self.start = self.last_save = time.monotonic()
+
+    def update(self, done: int) -> bool:
+        """Report that done items are finished, and return whether a
+        checkpoint is due."""
+        now = time.monotonic()
+        if self.progress:
+            elapsed = max(now - self.start, 1e-9)
+            self.progress(done, self.total, (done - self.resumed) / elapsed)
+        if now - self.last_save < self.interval:
+            return False
+        self.last_save = now
+        return True
@@ -4,15 +4,13 @@ from string import digits
 from poker_win_calculator.game_objects import Card, Dealer, Player
 from poker_win_calculator.hand_calculator import HandCalculator
 from poker_win_calculator.helpers import (
-    all_card_combos,
-    clear,
+    CARD_INTS,
+    CARD_STRS,
     key_input,
-    line_break,
-    print_centre,
-    print_lm,
     quit_cli,
     start_cli,
 )
+from poker_win_calculator.renderer import Renderer
 from poker_win_calculator.win_calculator import WinCalculator
 
 
@@ -30,22 +28,29 @@ class CLI:
     tot_player_msg = "Please enter a digit 1-9 (for number of players), (q)uit, or back to (m)enu"
     dealt_display = ""
 
+    def __init__(self):
+        # Pages are composed as frames and drawn by the renderer, which only
+        # rewrites the lines that changed since the last key press
+        self.screen = Renderer()
+
     def print_header(self):
-        """Print a standard header on each page of the CLI."""
-        clear()
-        line_break()
-        print_centre(self.header)
-        line_break()
-        print_centre(self.menu_options)
-        line_break()
-        print_lm(self.top_bar_msg)
+        """Start a new frame with a standard header on each page of the
+        CLI."""
+        self.screen.begin()
+        self.screen.line_break()
+        self.screen.centre(self.header)
+        self.screen.line_break()
+        self.screen.centre(self.menu_options)
+        self.screen.line_break()
+        self.screen.lm(self.top_bar_msg)
 
     def deal_hand_header(self):
-        """Print a standard header on the deal hand page of the CLI."""
+        """Start a new frame with a standard header on the deal hand page of
+        the CLI."""
         self.print_header()
         hand_printout = self.hand_printout.split("\n")
         for line in hand_printout:
-            print_lm(line)
+            self.screen.lm(line)
 
     def clear_top_bar(self):
         """Clear the top bar message."""
@@ -63,11 +68,13 @@ class CLI:
         """Run the main menu of the CLI."""
 
         start_cli()
+        self.screen.invalidate()
 
         while True:
             self.print_header()
             for line in self.readme.split('\n'):
-                print_lm(line)
+                self.screen.lm(line)
+            self.screen.render()
             usr_in = key_input()
             if usr_in == "Q":
                 quit_cli()
@@ -102,6 +109,7 @@ class CLI:
         """Deal a random or custom hand based on deal_type param."""
         self.set_top_bar(self.tot_player_msg)
         self.deal_hand_header()
+        self.screen.render()
         tot_players = key_input()
         while True:
             if tot_players == "Q":
@@ -134,10 +142,12 @@ class CLI:
             if deal_type == "random":
                 # Deal all cards to players and to the board
                 dealer.deal_full_round()
+                # Show the seed so the round can be dealt again
+                self.set_top_bar(
+                    f"Number of players: {tot_players}  Seed: {dealer.seed}")
                 # Store the round info (board cards + player cards)
             elif deal_type == "test":
                 self.clear_hand_printout()
-                self.deal_hand_header()
                 self.deal_test_hands(dealer)
 
             round_info = dealer.get_round_info()
@@ -153,6 +163,7 @@ class CLI:
             self.clear_hand_printout()
             self.hand_printout += f"{round_info}\n{results}"
             self.deal_hand_header()
+            self.screen.render()
             tot_players = key_input()
         return
 
@@ -170,21 +181,11 @@ class CardSelector:
 
     def convert_strings_to_Cards(self):
         """Convert the names in temp_cards to Card objects."""
-        usr_list = []
-        rank = ["2", "3", "4", "5", "6", "7",
-                "8", "9", "10", "J", "Q", "K", "A"]
-        for card in self.temp_cards:
-            # Get card rank, allowing for special case of a 10
-            r = "10" if card[0] == "1" else card[0]
-            s = card[2] if card[1] == "0" else card[1]
-            card_rank = rank.index(r)
-            card = Card(s, (r, card_rank + 2))
-            usr_list.append(card)
-        return usr_list
-
-    def print_cards_display(self, cards_display_string: str):
-        """Print the cards_display string."""
-        print_lm(cards_display_string)
+        return [Card.from_str(card) for card in self.temp_cards]
+
+    def print_cards_display(self, cli: CLI, cards_display_string: str):
+        """Add the cards_display string to the CLI's frame."""
+        cli.screen.lm(cards_display_string)
 
     def cards_display(self):
         """Return a string to display the cards in temp_cards."""
@@ -203,29 +204,31 @@ class CardSelector:
 
     def screen_draw(self, cli: CLI):
         """Draw the CLI screen for the user to input cards."""
-        valid_cards = all_card_combos()
-
         cli.set_top_bar("")
 
         while True:
-            clear()
             cli.deal_hand_header()
-            print_lm(cli.dealt_display)
-            line_break()
-            self.print_cards_display(self.cards_display())
-            line_break()
-            print_lm(self.input_display)
+            cli.screen.lm(cli.dealt_display)
+            cli.screen.line_break()
+            self.print_cards_display(cli, self.cards_display())
+            cli.screen.line_break()
+            cli.screen.lm(self.input_display)
+            cli.screen.render()
 
             c = key_input()
             cli.clear_top_bar()
             if c == keys.BACKSPACE:
                 self.input_display = self.input_display[:-1]
             elif c == keys.SPACE or c == keys.ENTER:
-                if self.input_display in self.dealt_cards:
+                # Store the displayed name of the card, so "TS" and "10S" are
+                # recognised as the same card
+                card = CARD_INTS.get(self.input_display)
+                card = CARD_STRS[card] if card is not None else None
+                if card in self.dealt_cards:
                     cli.set_top_bar("Duplicate Card!")
-                elif self.input_display in valid_cards:
-                    self.temp_cards.append(self.input_display)
-                    self.dealt_cards.append(self.input_display)
+                elif card:
+                    self.temp_cards.append(card)
+                    self.dealt_cards.append(card)
                     if len(self.temp_cards) == self.max_cards:
                         cli.dealt_display += self.cards_display() + " | "
                         return self.temp_cards
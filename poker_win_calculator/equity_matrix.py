@@ -0,0 +1,454 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache, partial
+from itertools import combinations, permutations
+from multiprocessing import Pool
+from random import Random
+
+from poker_win_calculator.chunked_runs import (
+    ChunkClock,
+    load_checkpoint,
+    print_progress,
+    run_settings,
+    save_checkpoint,
+    unfinished_chunks,
+)
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import CARDS, Card, Deck, sample_live
+from poker_win_calculator.helpers import parse_cards, permute_suit
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# A matrix file is a header of magic, format version, number of combos and
+# number of boards sampled, then a row of little-endian float32 equities for
+# every combo. Entries for combos that share a card are NaN.
+MAGIC = b"PWCEQMAT"
+HEADER = struct.Struct("<8sIIQ")
+VERSION = 1
+
+SUIT_PERMUTATIONS = list(permutations(range(4)))
+
+
+class ComboTable:
+    """Every two card combo of a deck, in card int order, with the
+    relabellings of the suits that map combos onto each other.
+
+    Combos that are the same up to suits (e.g. AcKc and AhKh) have the same
+    equity against combos relabelled the same way, so only one representative
+    of each class is computed, 169 in a standard deck, and every other row
+    is the representative's row relabelled."""
+
+    def __init__(self, ruleset: Ruleset = STANDARD):
+        self.ruleset = ruleset
+        self.combos = list(combinations(Deck(ruleset).live_ints(), 2))
+        self.n = len(self.combos)
+        self.index = {combo: i for i, combo in enumerate(self.combos)}
+        self.masks = [1 << a | 1 << b for a, b in self.combos]
+
+        # permuted[p][i] is the index of combo i with its suits relabelled by
+        # SUIT_PERMUTATIONS[p]
+        self.permuted = []
+        for suits in SUIT_PERMUTATIONS:
+            self.permuted.append([
+                self.combo_index(
+                    permute_suit(a, suits), permute_suit(b, suits))
+                for a, b in self.combos
+            ])
+        self.inverse = [
+            SUIT_PERMUTATIONS.index(
+                tuple(suits.index(s) for s in range(4)))
+            for suits in SUIT_PERMUTATIONS
+        ]
+
+        # The lowest combo of each class represents it, and every combo
+        # records its representative and the relabelling that maps the
+        # representative onto it
+        self.reps = []
+        self.rep_of = [None] * self.n
+        for i in range(self.n):
+            rep = min(table[i] for table in self.permuted)
+            if rep == i:
+                self.reps.append(i)
+        rep_position = {rep: r for r, rep in enumerate(self.reps)}
+        for r, rep in enumerate(self.reps):
+            for p, table in enumerate(self.permuted):
+                i = table[rep]
+                if self.rep_of[i] is None:
+                    self.rep_of[i] = (rep_position[rep], p)
+
+        # Bitsets, with bit i for combo i, of the combos that don't share a
+        # card with each combo
+        self.disjoint = []
+        for mask in self.masks:
+            bits = 0
+            for j, other in enumerate(self.masks):
+                if not mask & other:
+                    bits |= 1 << j
+            self.disjoint.append(bits)
+
+    def combo_index(self, a: int, b: int) -> int:
+        """Return the index of the combo of two card ints."""
+        return self.index[(a, b) if a < b else (b, a)]
+
+    def hole_index(self, hole) -> int:
+        """Return the index of a hole given as two Cards, two card ints or a
+        string like "AsKs"."""
+        if isinstance(hole, str):
+            hole = parse_cards(hole)
+        a, b = (c.card_int if isinstance(c, Card) else c for c in hole)
+        if a == b:
+            raise ValueError("A hole can't hold the same card twice")
+        try:
+            return self.combo_index(a, b)
+        except KeyError:
+            raise ValueError(f"{hole} isn't in the {self.ruleset.name} deck")
+
+    def stabiliser_orbits(self, rep: int) -> list:
+        """Return the classes of combos that the relabellings leaving rep
+        unchanged map onto each other, so they have the same equity against
+        rep."""
+        tables = [table for table in self.permuted if table[rep] == rep]
+        seen = set()
+        orbits = []
+        for j in range(self.n):
+            if j not in seen:
+                orbit = sorted({table[j] for table in tables})
+                seen.update(orbit)
+                orbits.append(orbit)
+        return orbits
+
+
+@lru_cache(maxsize=None)
+def combo_table(ruleset: Ruleset) -> ComboTable:
+    """Return the ComboTable of a ruleset, built once per process."""
+    return ComboTable(ruleset)
+
+
+def add_bits(planes: list, bits: int):
+    """Add one to the counter of every set bit of bits. The counters are bit
+    sliced: planes[p] holds bit p of every counter, so one addition is a
+    few big int operations, however many counters it touches."""
+    for p, plane in enumerate(planes):
+        if not bits:
+            return
+        planes[p] = plane ^ bits
+        bits &= plane
+    if bits:
+        planes.append(bits)
+
+
+def plane_counts(planes: list, counts: array, offset: int):
+    """Add bit sliced counters to counts, starting at offset."""
+    for p, plane in enumerate(planes):
+        weight = 1 << p
+        # Binary digits lowest bit first, without the "0b"
+        for j, bit in enumerate(bin(plane)[:1:-1]):
+            if bit == "1":
+                counts[offset + j] += weight
+
+
+def matrix_chunk(args: tuple) -> tuple:
+    """Return (chunk id, boards, wins, ties, showdowns) of a chunk of random
+    boards. Each is an array with a row of counts against every combo for
+    each class representative.
+
+    Every board is shared by all the combos: each combo that doesn't touch
+    the board is evaluated once, the combos are sorted by hand value, and a
+    representative beats exactly the combos sorted below it. So a board costs
+    one evaluation per combo rather than one per pair."""
+    chunk, boards, seed, ruleset = args
+    rng = Random(seed)
+    value = Evaluator(ruleset).value
+    table = combo_table(ruleset)
+    n, masks, disjoint = table.n, table.masks, table.disjoint
+    holes = [[CARDS[a], CARDS[b]] for a, b in table.combos]
+    deck = Deck(ruleset)
+    live, first = deck.live, deck.first
+
+    n_reps = len(table.reps)
+    win_planes = [[] for _ in range(n_reps)]
+    tie_planes = [[] for _ in range(n_reps)]
+    showdown_planes = [[] for _ in range(n_reps)]
+    lower = [0] * n
+    equal = [0] * n
+
+    for _ in range(boards):
+        board = sample_live(live, 5, rng, first)
+        board_mask = 0
+        for card_int in board:
+            board_mask |= 1 << card_int
+        board = [CARDS[card_int] for card_int in board]
+        values = sorted(
+            (value(holes[i] + board), i)
+            for i in range(n) if not masks[i] & board_mask
+        )
+
+        # For each combo, bitsets of the combos with a lower and an equal hand
+        below = 0
+        start = 0
+        while start < len(values):
+            end = start
+            group = 0
+            while end < len(values) and values[end][0] == values[start][0]:
+                group |= 1 << values[end][1]
+                end += 1
+            for _, i in values[start:end]:
+                lower[i] = below
+                equal[i] = group
+            below |= group
+            start = end
+
+        for r, rep in enumerate(table.reps):
+            if masks[rep] & board_mask:
+                continue
+            showdowns = below & disjoint[rep]
+            add_bits(showdown_planes[r], showdowns)
+            add_bits(win_planes[r], lower[rep] & showdowns)
+            add_bits(tie_planes[r], equal[rep] & showdowns)
+
+    counts = []
+    for planes in (win_planes, tie_planes, showdown_planes):
+        totals = array("q", bytes(8 * n_reps * n))
+        for r in range(n_reps):
+            plane_counts(planes[r], totals, r * n)
+        counts.append(totals)
+    return (chunk, boards, *counts)
+
+
+class EquityMatrixGenerator:
+    """Computes the all-in preflop equity of every combo against every other
+    combo from random boards, in chunks spread across processes.
+
+    Only the rows of the class representatives are sampled (see ComboTable).
+    Each row is then averaged over the combos that are the same against its
+    representative, every other row is a relabelled representative row, and
+    A vs B is pooled with 1 - B vs A, so the matrix is exactly symmetric.
+
+    As in the TournamentSimulator, each chunk has its own seed (see
+    chunked_runs) so the result doesn't depend on the number of processes,
+    and with a checkpoint path
+    the counts and finished chunks are saved to disk so a later run with the
+    same settings resumes from it."""
+
+    def __init__(
+        self,
+        processes: int = None,
+        chunk_size: int = 500,
+        seed: int = 0,
+        checkpoint: str = None,
+        checkpoint_interval: float = 10.0,
+        progress=partial(print_progress, unit="boards", digits=1),
+        ruleset: Ruleset = STANDARD,
+    ):
+        self.processes = processes or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.progress = progress
+        self.ruleset = ruleset
+        self.table = combo_table(ruleset)
+        self.size = len(self.table.reps) * self.table.n
+
+    def settings(self, boards: int) -> dict:
+        """Return the settings a checkpoint must match to be resumed."""
+        return run_settings(
+            self.chunk_size, self.seed, self.ruleset, boards=boards)
+
+    def empty_counts(self) -> list:
+        """Return zeroed wins, ties and showdowns arrays."""
+        return [array("q", bytes(8 * self.size)) for _ in range(3)]
+
+    def load_checkpoint(self, boards: int) -> tuple:
+        """Return (counts, boards done, set of finished chunks) from the
+        checkpoint, or empty counts if there is no checkpoint to resume."""
+
+        def read_counts(f) -> list:
+            counts = [array("q") for _ in range(3)]
+            for totals in counts:
+                totals.fromfile(f, self.size)
+            return counts
+
+        state, counts = load_checkpoint(
+            self.checkpoint, self.settings(boards), read_counts)
+        if state is None:
+            return self.empty_counts(), 0, set()
+        return counts, state["boards_done"], state["done"]
+
+    def save_checkpoint(
+        self, boards: int, counts: list, boards_done: int, done: set
+    ):
+        """Save the boards done and the finished chunks, followed by the raw
+        counts (see save_checkpoint)."""
+
+        def write_counts(f):
+            for totals in counts:
+                totals.tofile(f)
+
+        save_checkpoint(
+            self.checkpoint, self.settings(boards), done,
+            {"boards_done": boards_done}, write_counts)
+
+    def chunks(self, boards: int, done: set) -> list:
+        """Return the arguments for each chunk that hasn't been finished."""
+        return [
+            (i, chunk_boards, seed, self.ruleset)
+            for i, chunk_boards, seed in unfinished_chunks(
+                boards, self.chunk_size, self.seed, done)
+        ]
+
+    def sample(self, boards: int) -> list:
+        """Sample a number of boards, resuming from the checkpoint if there
+        is one, and return the wins, ties and showdowns arrays."""
+        counts, boards_done, done = self.load_checkpoint(boards)
+        clock = ChunkClock(
+            boards, boards_done, self.checkpoint_interval, self.progress)
+        with Pool(self.processes) as pool:
+            results = pool.imap_unordered(
+                matrix_chunk, self.chunks(boards, done))
+            for chunk, chunk_boards, *chunk_counts in results:
+                for totals, chunk_totals in zip(counts, chunk_counts):
+                    for i, count in enumerate(chunk_totals):
+                        if count:
+                            totals[i] += count
+                done.add(chunk)
+                boards_done += chunk_boards
+                save_due = clock.update(boards_done)
+                if self.checkpoint and save_due:
+                    self.save_checkpoint(boards, counts, boards_done, done)
+
+        if self.checkpoint:
+            self.save_checkpoint(boards, counts, boards_done, done)
+        return counts
+
+    def symmetrised_rows(self, counts: list) -> tuple:
+        """Return (points, showdowns) of the representative rows, averaged
+        over the combos that are the same against each representative. A win
+        is two points and a tie one."""
+        wins, ties, showdowns = counts
+        n = self.table.n
+        points = array("d", bytes(8 * self.size))
+        averaged = array("d", bytes(8 * self.size))
+        for r, rep in enumerate(self.table.reps):
+            for orbit in self.table.stabiliser_orbits(rep):
+                cells = [r * n + j for j in orbit]
+                total_points = sum(2 * wins[c] + ties[c] for c in cells)
+                total_showdowns = sum(showdowns[c] for c in cells)
+                for c in cells:
+                    points[c] = total_points / len(cells)
+                    averaged[c] = total_showdowns / len(cells)
+        return points, averaged
+
+    def matrix(self, counts: list) -> array:
+        """Return the n x n float matrix of equities from the counts."""
+        table = self.table
+        n = table.n
+        points, showdowns = self.symmetrised_rows(counts)
+
+        def cell(i: int, j: int) -> int:
+            """Return the index in the representative rows of i vs j."""
+            r, p = table.rep_of[i]
+            return r * n + table.permuted[table.inverse[p]][j]
+
+        values = array("f", [float("nan")]) * (n * n)
+        for i in range(n):
+            for j in range(i + 1, n):
+                if table.masks[i] & table.masks[j]:
+                    continue
+                ij, ji = cell(i, j), cell(j, i)
+                total = showdowns[ij] + showdowns[ji]
+                if not total:
+                    continue
+                # A vs B pooled with B vs A: B's points are A's losses
+                equity = (points[ij] + 2 * showdowns[ji] - points[ji])
+                equity /= 2 * total
+                values[i * n + j] = equity
+                values[j * n + i] = 1 - equity
+        return values
+
+    def run(self, boards: int) -> array:
+        """Sample a number of boards and return the matrix of equities."""
+        return self.matrix(self.sample(boards))
+
+    def write(self, path: str, boards: int):
+        """Sample a number of boards, write the matrix to a file and return it
+        as an EquityMatrix."""
+        values = self.run(boards)
+        if sys.byteorder != "little":
+            values.byteswap()
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, self.table.n, boards))
+            values.tofile(f)
+        return EquityMatrix(path, self.ruleset)
+
+
+class EquityMatrix:
+    """Looks up all-in equities in a matrix file written by an
+    EquityMatrixGenerator, through a read-only memory map, so only the rows
+    that are used are paged in."""
+
+    def __init__(self, path: str, ruleset: Ruleset = STANDARD):
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, n, self.boards = HEADER.unpack_from(self.mmap)
+        self.table = combo_table(ruleset)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{path} isn't an equity matrix file")
+        if n != self.table.n:
+            self.close()
+            raise ValueError(f"{path} isn't a {ruleset.name} matrix")
+        self.view = memoryview(self.mmap)[HEADER.size:]
+        if sys.byteorder == "little":
+            self.values = self.view.cast("f")
+        else:
+            self.values = array("f", self.view)
+            self.values.byteswap()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def equity(self, hole, other) -> float:
+        """Return the all-in equity of one hole against another. Holes are
+        two Cards, two card ints or a string like "AsKs"."""
+        i = self.table.hole_index(hole)
+        j = self.table.hole_index(other)
+        if self.table.masks[i] & self.table.masks[j]:
+            raise ValueError("The holes share a card")
+        return self.values[i * self.table.n + j]
+
+    def row(self, hole) -> list:
+        """Return the equity of a hole against every combo, in combo order,
+        with NaN for the combos that share a card with it."""
+        i = self.table.hole_index(hole)
+        n = self.table.n
+        return list(self.values[i * n:(i + 1) * n])
+
+    def range_equity(self, hole, others: list) -> float:
+        """Return the equity of a hole against a range of holes, each equally
+        likely, skipping any that share a card with it."""
+        i = self.table.hole_index(hole)
+        n = self.table.n
+        total = 0.0
+        count = 0
+        for other in others:
+            j = self.table.hole_index(other)
+            if not self.table.masks[i] & self.table.masks[j]:
+                total += self.values[i * n + j]
+                count += 1
+        if not count:
+            raise ValueError("Every hole in the range shares a card")
+        return total / count
+
+    def close(self):
+        if hasattr(self, "values") and isinstance(self.values, memoryview):
+            self.values.release()
+        if hasattr(self, "view"):
+            self.view.release()
+        self.mmap.close()
+        self.file.close()
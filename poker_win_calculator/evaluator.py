@@ -0,0 +1,79 @@
+from itertools import combinations
+
+from poker_win_calculator.game_objects import CARDS, Deck, Player
+from poker_win_calculator.hand_calculator import HandCalculator
+from poker_win_calculator.kernel import load_kernel
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+from poker_win_calculator.win_calculator import WinCalculator
+
+
+class Evaluator:
+    """Ranks hands and settles showdowns by the HandCalculator and
+    WinCalculator rules without building Player and WinCalculator objects for
+    every round. Used wherever many rounds need to be evaluated."""
+
+    def __init__(self, ruleset: Ruleset = STANDARD):
+        self.ruleset = ruleset
+        self.rank_types = ruleset.rank_types
+        # A HandCalculator with no cards of its own, used only for its checks
+        self.calculator = HandCalculator([], Player(0), ruleset)
+        # The generated kernel gives the same values for seven cards
+        self.kernel = load_kernel(ruleset)
+
+    def hands(self, cards: list) -> dict:
+        """Return the hands dict for the best hand among the cards."""
+        return self.calculator.get_hands(cards)
+
+    def value(self, cards: list) -> tuple:
+        """Return a value of the best hand among the cards that sorts higher
+        for a better hand (see WinCalculator.hand_value)."""
+        if len(cards) == 7:
+            return self.kernel.evaluate_cards(cards)
+        hands = self.calculator.get_hands(cards)
+        return WinCalculator.hand_value(hands, self.rank_types)
+
+    def category(self, value: tuple) -> str:
+        """Return the rank type, e.g. "Flush", of a hand value."""
+        return self.rank_types[len(self.rank_types) - value[0]]
+
+    def showdown(self, holes: list, board: list) -> tuple:
+        """Return the indexes of the winning hole(s) and the hand value of
+        every hole with the given board. Two card holes with a full board go
+        through the kernel's showdown."""
+        if len(board) == 5:
+            try:
+                pairs = [(a.card_int, b.card_int) for a, b in holes]
+            except ValueError:
+                # Holes that aren't two cards, as in Omaha
+                pairs = None
+            if pairs is not None:
+                c, d, e, f, g = board
+                return self.kernel.showdown(pairs, (
+                    c.card_int, d.card_int, e.card_int, f.card_int, g.card_int
+                ))
+        values = [self.value(hole + board) for hole in holes]
+        best = max(values)
+        winners = [i for i, value in enumerate(values) if value == best]
+        return winners, values
+
+    def remaining_cards(self, known: list) -> list:
+        """Return the Cards of the deck that aren't in the known cards, in card
+        int order."""
+        deck = Deck(self.ruleset, known)
+        return [CARDS[card_int] for card_int in deck.live_ints()]
+
+    def equity(self, holes: list, board: list, dead: list = ()) -> list:
+        """Return each hole's share of the pot over every possible runout of
+        the board, with split pots shared between the tied holes. Enumerates
+        all runouts, so it's intended for the flop and turn."""
+        known = [card for hole in holes for card in hole] + board + list(dead)
+        remaining = self.remaining_cards(known)
+
+        shares = [0.0] * len(holes)
+        runouts = 0
+        for runout in combinations(remaining, 5 - len(board)):
+            winners, _ = self.showdown(holes, board + list(runout))
+            for i in winners:
+                shares[i] += 1 / len(winners)
+            runouts += 1
+        return [share / runouts for share in shares]
@@ -1,18 +1,42 @@
 from poker_win_calculator.helpers import (
-    all_card_combos,
+    CARD_INTS,
+    CARD_RANK,
+    CARD_STRS,
+    CARD_SUITS,
     debug_print,
     line_break,
+    parse_card,
 )
-from random import shuffle
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+import random
 
 
 class Card:
+    # Locations of a card that isn't with a player (player ids from 1)
+    IN_DECK = -1
+    BOARD = 0
+    BURNED = -2
+
     def __init__(self, suit: str, rank: tuple):
         # id is used to concisely display the card
         self.rank = rank[1]
         self.suit = suit
-        self.location = -1
-        self.id = f"{rank[0]}{suit}"
+        self.location = Card.IN_DECK
+        self.card_int = CARD_INTS[f"{rank[0]}{suit}"]
+        # Cards share the interned name rather than keeping their own copy
+        self.id = CARD_STRS[self.card_int]
+
+    @classmethod
+    def from_int(cls, card_int: int):
+        """Return a new Card from a card int (see helpers.CARD_STRS)."""
+        rank, suit = divmod(card_int, 4)
+        return cls(CARD_SUITS[suit], (CARD_RANK[rank], rank + 2))
+
+    @classmethod
+    def from_str(cls, s: str):
+        """Return a new Card from a card name such as "10S", "Ts" or "kH".
+        Raises ValueError for anything else."""
+        return cls.from_int(parse_card(s))
 
     def __lt__(self, other):
         return self.rank < other.rank
@@ -21,24 +45,93 @@ class Card:
         return f"{self.id}"
 
 
-class Deck:
-    rank = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
-    suits = ["C", "D", "S", "H"]
+# One read-only Card for each card int, for code that evaluates cards without
+# dealing them. Never change the location of these Cards.
+CARDS = tuple(Card.from_int(i) for i in range(len(CARD_STRS)))
+
 
-    def __init__(self):
-        self.cards = self.initialize_deck()
+def sample_live(live: int, k: int, rng=random, first: int = 0) -> list:
+    """Return k distinct random card ints from a bitmask of live cards, where
+    bit n is set if card int n can be dealt. Cards are drawn by rejection from
+    the range of card ints from first, so the cost is proportional to the
+    number of cards drawn rather than to the size of the deck."""
+    if bin(live).count("1") < k:
+        raise ValueError("Not enough cards left in the deck")
+    span = len(CARD_STRS) - first
+    cards = []
+    while len(cards) < k:
+        card_int = first + int(rng.random() * span)
+        if live >> card_int & 1:
+            live &= ~(1 << card_int)
+            cards.append(card_int)
+    return cards
+
+
+class Deck:
+    suits = CARD_SUITS
+
+    def __init__(
+        self,
+        ruleset: Ruleset = STANDARD,
+        dead_cards: list = (),
+        rng=random,
+        seed: int = None,
+    ):
+        self.ruleset = ruleset
+        # Rank names of this deck from lowest to highest
+        self.rank = ruleset.rank
+        # A seeded deck has its own RNG, so its deals can be repeated
+        self.seed = seed
+        self.rng = rng if seed is None else random.Random(seed)
+        # Card ints in the order they were drawn
+        self.dealt = []
+        # Decks without the low ranks (Short Deck) start at a higher card int
+        self.first = (ruleset.rank_values[0] - 2) * len(CARD_SUITS)
+        # Bitmask of the cards that can still be dealt, by card int
+        self.live = 0
+        for card_int in range(self.first, len(CARD_STRS)):
+            self.live |= 1 << card_int
+        self.remove(dead_cards)
+
+    def __len__(self):
+        return bin(self.live).count("1")
+
+    @property
+    def cards(self) -> list:
+        """Return a shuffled list of the Cards left in the deck."""
+        return self.initialize_deck()
 
     def initialize_deck(self) -> list:
-        """Return a shuffled deck (randomized list of Cards). Called on each
-        round."""
-        deck = []
-        for suit in self.suits:
-            for i in range(2, 15):
-                card = Card(suit, (self.rank[i - 2], i))
-                deck.append(card)
-        shuffle(deck)
+        """Return a shuffled deck (randomized list of the Cards left in the
+        deck)."""
+        deck = [Card.from_int(card_int) for card_int in self.live_ints()]
+        self.rng.shuffle(deck)
         return deck
 
+    def live_ints(self) -> list:
+        """Return the card ints left in the deck, in order."""
+        live = self.live
+        return [i for i in range(self.first, len(CARD_STRS)) if live >> i & 1]
+
+    def remove(self, cards: list):
+        """Remove Cards from the deck so they can't be dealt."""
+        for card in cards:
+            self.live &= ~(1 << card.card_int)
+
+    def draw_ints(self, k: int) -> list:
+        """Draw k random card ints from the deck."""
+        card_ints = sample_live(self.live, k, self.rng, self.first)
+        for card_int in card_ints:
+            self.live &= ~(1 << card_int)
+        self.dealt += card_ints
+        return card_ints
+
+    def draw(self, location: int = Card.IN_DECK) -> Card:
+        """Draw a random Card from the deck and mark where it's going."""
+        card = Card.from_int(self.draw_ints(1)[0])
+        card.location = location
+        return card
+
 
 class Player:
     def __init__(self, id: int):
@@ -47,6 +140,8 @@ class Player:
         # Hands are given to this object by the HandCalculator
         self.hands = None
         self.highest_hand = None
+        # Best 8-or-better low, only reported in hi/lo games
+        self.low_hand = None
 
     def __repr__(self):
         return f"Player {self.id}: {self.hole}"
@@ -56,10 +151,29 @@ class Dealer:
 
     streets = {"3": "Flop", "4": "Turn", "5": "River"}
 
-    def __init__(self, players: list):
+    def __init__(
+        self, players: list, ruleset: Ruleset = STANDARD,
+        dead_cards: list = (), seed: int = None
+    ):
+        self.ruleset = ruleset
+        # Every round is dealt from a seed, drawn from the global RNG if none
+        # is given, so any round can be dealt again from its seed. Seeds are
+        # 64 bit, so they fit a round log record
+        if seed is None:
+            seed = random.getrandbits(64)
+        elif not 0 <= seed < 2 ** 64:
+            raise ValueError("A seed must be between 0 and 2**64 - 1")
+        self.seed = seed
+        self.hole_size = 2
+        # Card ints that must never be dealt: folded hands, cards removed by
+        # the user, and exposed burn cards
+        self.dead_ints = []
+        self.burned = []
         self.deck = self.get_new_deck()
-        # List of Player() objects
-        self.players = players
+        self.kill_cards(dead_cards)
+        # List of Player() objects still in the round. A copy, so folding
+        # doesn't change the caller's list
+        self.players = list(players)
         self.community_cards = []
 
     def get_round_info(self) -> str:
@@ -81,8 +195,33 @@ class Dealer:
         line_break()
 
     def burn_card(self):
-        """Simulate burning a card by popping it off the deck list."""
-        self.deck.pop()
+        """Burn a card from the deck. Burned cards are kept in self.burned in
+        case they're exposed."""
+        card = self.deck.draw(Card.BURNED)
+        self.burned.append(card)
+
+    def expose_burned_cards(self):
+        """Mark the burned cards as dead after they've been shown."""
+        self.kill_cards(self.burned)
+
+    @property
+    def dead_cards(self) -> list:
+        """Return the dead cards as the read-only Cards in CARDS."""
+        return [CARDS[card_int] for card_int in self.dead_ints]
+
+    def kill_cards(self, cards: list):
+        """Remove cards from play so they're never dealt, e.g. cards the user
+        has seen or removed. The Cards themselves aren't changed, as they may
+        be the shared Cards in CARDS."""
+        for card in cards:
+            if card.card_int not in self.dead_ints:
+                self.dead_ints.append(card.card_int)
+        self.deck.remove(cards)
+
+    def fold(self, player: Player):
+        """Fold a player's hand, leaving their hole cards dead."""
+        self.players.remove(player)
+        self.kill_cards(player.hole)
 
     def deal_test_hands(self):
         """Allow user to test specific hands by getting user input."""
@@ -96,19 +235,14 @@ class Dealer:
             for i in range(n):
                 while True:
                     c = input(f"  Card {i+1}: ")
-                    c = c.upper()
-                    if c not in all_card_combos():
+                    if c not in CARD_INTS:
                         print("Invalid Card")
-                    elif c in test_list:
+                    elif CARD_INTS[c] in test_list:
                         print("Duplicate Card")
                     else:
-                        test_list.append(c)
+                        test_list.append(CARD_INTS[c])
                         break
-                r = "10" if c[0] == "1" else c[0]
-                s = c[2] if c[1] == "0" else c[1]
-                rank = Deck.rank.index(r)
-                card = Card(s, (r, rank + 2))
-                usr_list.append(card)
+                usr_list.append(Card.from_int(CARD_INTS[c]))
             return usr_list
 
         for player in self.players:
@@ -120,19 +254,14 @@ class Dealer:
         comm_cards = get_user_card_input(5)
         self.community_cards = comm_cards
 
-    def deal_card(self, location=0) -> Card:
+    def deal_card(self, location=Card.BOARD) -> Card:
         """Deal a card to a player or the board."""
-        card = self.deck.pop()
-        card.location = location
-        # Place card at the "bottom" of the deck so it can be used in
-        # calculating odds. Since it's marked by the location attribute, we
-        # know whether it's really in the deck (-1) or elsewhere (0, 1, 2, ...)
-        self.deck.insert(0, card)
-        return card
+        return self.deck.draw(location)
 
-    def deal_full_round(self):
-        """Deal to all players, deal all community cards to the board."""
-        self.deal_to_players()
+    def deal_full_round(self, hole_size: int = 2):
+        """Deal to all players, deal all community cards to the board. Deal
+        a hole_size of 4 for Omaha."""
+        self.deal_to_players(hole_size)
         self.deal_flop()
         self.deal_turn()
         self.deal_river()
@@ -152,11 +281,12 @@ class Dealer:
         card = self.deal_card()
         self.community_cards.append(card)
 
-    def deal_to_players(self):
-        """Deal two cards to each player."""
+    def deal_to_players(self, hole_size: int = 2):
+        """Deal hole_size (two by default) cards to each player."""
+        self.hole_size = hole_size
         for player in self.players:
             hole = []
-            for _ in range(2):
+            for _ in range(hole_size):
                 card = self.deal_card(player.id)
                 hole.append(card)
             player.hole = sorted(hole, reverse=True)
@@ -166,9 +296,9 @@ class Dealer:
         self.burn_card()
         self.deal_to_community_cards()
 
-    def get_new_deck(self) -> list:
-        """Returns a shuffled Deck of Cards."""
-        return Deck().cards
+    def get_new_deck(self) -> Deck:
+        """Returns a Deck without the dead cards, shuffled by the seed."""
+        return Deck(self.ruleset, self.dead_cards, seed=self.seed)
 
     def which_street(self, length: int) -> str:
         """Return which street is on display based on len of community cards"""
@@ -1,14 +1,42 @@
+from itertools import combinations
+
 from poker_win_calculator.game_objects import Player
 from poker_win_calculator.helpers import all_in, none_in
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+from poker_win_calculator.win_calculator import WinCalculator
+
+# Ace-to-five low ranks. The Ace always plays low, and only cards Eight or
+# lower can make a qualifying low in hi/lo (8-or-better) games.
+LOW_RANKS = {14: 1, 2: 2, 3: 3, 4: 4, 5: 5, 6: 6, 7: 7, 8: 8}
+
+
+def build_low_table() -> list:
+    """Return a list indexed by a bitmask of low ranks (bit 0 is the Ace, bit 7
+    the Eight) holding the best low those ranks make, or None if there are
+    fewer than five. A low is a tuple of its ranks from highest to lowest, so
+    a smaller tuple is a better low."""
+    table = []
+    for mask in range(256):
+        ranks = [i + 1 for i in range(8) if mask >> i & 1]
+        low = tuple(reversed(ranks[:5])) if len(ranks) >= 5 else None
+        table.append(low)
+    return table
+
+
+LOW_HAND_TABLE = build_low_table()
 
 
 class HandCalculator:
     """Takes a Player object and a deck of dealt cards and calculates the
     Player's valid hands and ranks them."""
 
-    def __init__(self, community_cards: list, player: Player):
+    def __init__(
+        self, community_cards: list, player: Player,
+        ruleset: Ruleset = STANDARD
+    ):
         # The order of these attributes should be fixed, as calculating the
         # value of one usually depends on calculating the previous ones.
+        self.ruleset = ruleset
         self.player = player
         self.hole = player.hole
         self.comm_cards = community_cards
@@ -18,22 +46,40 @@ class HandCalculator:
         """Report the player's hands to the player object."""
         self.player.hands = self.get_hands(self.dealt)
 
+    def report_hi_lo_hands_to_player(self, omaha: bool = False):
+        """Report the player's high hands and best qualifying low to the
+        player object. Omaha hands must use exactly two hole cards."""
+        if omaha:
+            self.player.hands = self.get_omaha_hands(
+                self.hole, self.comm_cards)
+            self.player.low_hand = self.get_omaha_low_hand(
+                self.hole, self.comm_cards)
+        else:
+            self.player.hands = self.get_hands(self.dealt)
+            self.player.low_hand = self.get_low_hand(self.dealt)
+
     def get_hands(self, cards: list) -> dict:
         """Return a dict of all possible hands and their values."""
 
         # Return a simplified dict based on player's hands
         hands = self.matches_check(cards)
-        hands = self.sort_matches(hands)
+        hands = self.sort_matches(hands, cards)
 
         quads = self.quads_check(hands)
         if quads:
             return quads
 
+        st_or_flush = self.best_straight_or_flush(cards, hands)
+        # When the ruleset ranks a flush above a full house (Short Deck), any
+        # flush is checked first. Straights still rank below a full house.
+        beats_full_house = st_or_flush and "Straight" not in st_or_flush
+        if self.ruleset.flush_beats_full_house and beats_full_house:
+            return st_or_flush
+
         full_house = self.full_house_check(hands)
         if full_house:
             return full_house
 
-        st_or_flush = self.best_straight_or_flush(cards, hands)
         if st_or_flush:
             return st_or_flush
 
@@ -52,57 +98,106 @@ class HandCalculator:
         # kickers may be needed to break a tie.
         return hands
 
+    def get_omaha_hands(self, hole: list, board: list) -> dict:
+        """Return the best hands dict that can be made from exactly two hole
+        cards and three board cards."""
+        best_hands = None
+        best_value = None
+        for two in combinations(hole, 2):
+            for three in combinations(board, 3):
+                hands = self.get_hands(list(two + three))
+                value = WinCalculator.hand_value(
+                    hands, self.ruleset.rank_types)
+                if best_value is None or value > best_value:
+                    best_hands, best_value = hands, value
+        return best_hands
+
+    def low_mask(self, cards: list) -> int:
+        """Return a bitmask of the distinct low ranks among the cards."""
+        mask = 0
+        for card in cards:
+            low = LOW_RANKS.get(card.rank)
+            if low:
+                mask |= 1 << (low - 1)
+        return mask
+
+    def get_low_hand(self, cards: list) -> tuple:
+        """Return the best 8-or-better low among the cards, or None if the
+        cards don't make a qualifying low."""
+        return LOW_HAND_TABLE[self.low_mask(cards)]
+
+    def get_omaha_low_hand(self, hole: list, board: list) -> tuple:
+        """Return the best 8-or-better low made from exactly two hole cards and
+        three board cards, or None if there is no qualifying low."""
+        # Only combos of distinct low ranks can be part of a low, and a hole
+        # pair can only combine with a board trio that shares none of its ranks
+        hole_masks = {self.low_mask(two) for two in combinations(hole, 2)}
+        hole_masks = [m for m in hole_masks if bin(m).count("1") == 2]
+        board_masks = {self.low_mask(cs) for cs in combinations(board, 3)}
+        board_masks = [m for m in board_masks if bin(m).count("1") == 3]
+
+        best = None
+        for hole_mask in hole_masks:
+            for board_mask in board_masks:
+                if hole_mask & board_mask:
+                    continue
+                low = LOW_HAND_TABLE[hole_mask | board_mask]
+                if best is None or low < best:
+                    best = low
+        return best
+
     def best_straight_or_flush(self, cards: list, hands: dict) -> dict:
-        """Return a dict of the best straight or flush."""
-        straight = self.straight_check(cards)
-        flush: list = self.flush_check(cards)
+        """Return a dict of the best straight flush, flush, or straight."""
+        flush_mask = self.flush_mask(cards)
+        if flush_mask:
+            # Only the cards of the flush suit can make a straight flush, so
+            # look up the straight in that suit's ranks alone
+            straight_flush = self.ruleset.straight_table[flush_mask]
+            if straight_flush == 14:
+                return {"Royal Flush": straight_flush}
+            elif straight_flush:
+                return {"Straight Flush": straight_flush}
 
-        if flush and straight == flush[-1] and straight - 4 == flush[0]:
-            if straight == 14:
-                return {"Royal Flush": straight}
-            return {"Straight Flush": straight}
-        elif straight:
-            return {"Straight": straight}
-        elif flush:
             order = ["Flush", "Second", "Third", "Fourth", "Fifth"]
-            flush_dict = {}
-
-            for i in range(5):
-                flush_dict[order[i]] = flush[-(i + 1)]
-
-            return flush_dict
+            flush = self.ruleset.flush_table[flush_mask]
+            return dict(zip(order, flush))
 
+        straight = self.straight_check(cards)
+        if straight:
+            return {"Straight": straight}
         return None
 
+    def rank_mask(self, cards: list) -> int:
+        """Return a 13-bit mask of the ranks among the cards, where bit 0 is a
+        Two and bit 12 an Ace."""
+        mask = 0
+        for card in cards:
+            mask |= 1 << (card.rank - 2)
+        return mask
+
     def straight_check(self, cards: list) -> int:
         """Return the highest card in the straight, or None if no straight."""
-        ranks = [card.rank for card in cards]
-        for rank in ranks:
-            test_range = range(rank, rank - 5, -1)
-            if set(test_range).issubset(ranks):
-                return max(test_range)
-
-        ace_five = [2, 3, 4, 5, 14]
-        if set(ace_five).issubset(ranks):
-            return 5
-        return None
+        # The ruleset's straight table maps every mask of ranks to its best
+        # straight, including the wheel of the deck (A-2-3-4-5 or A-6-7-8-9)
+        return self.ruleset.straight_table[self.rank_mask(cards)] or None
+
+    def flush_mask(self, cards: list) -> int:
+        """Return the rank mask of the suit with five or more cards, or 0 if
+        there is no flush. Seven cards can't make a flush in two suits."""
+        suit_masks = {}
+        for card in cards:
+            suit_masks[card.suit] = (
+                suit_masks.get(card.suit, 0) | 1 << (card.rank - 2))
+        for mask in suit_masks.values():
+            if self.ruleset.flush_table[mask]:
+                return mask
+        return 0
 
     def flush_check(self, cards: list) -> list:
         """Return a list of the highest five cards in the flush, or None if no
         flush."""
-        suited_count = {}
-        for card in cards:
-            suit = card.suit
-            if suit in suited_count:
-                suited_count[suit] += 1
-            else:
-                suited_count[suit] = 1
-        flush = None
-        for suit, count in suited_count.items():
-            if count >= 5:
-                ranks = [card.rank for card in cards if card.suit == suit]
-                flush = sorted(ranks)
-        return flush
+        flush = self.ruleset.flush_table[self.flush_mask(cards)]
+        return sorted(flush) if flush else None
 
     def quads_check(self, hands: dict) -> dict:
         """Return a dict of the quads and the kicker, or None if no quads."""
@@ -176,7 +271,7 @@ class HandCalculator:
         matches = {rank: size for rank, size in matches.items() if size > 1}
         return matches
 
-    def sort_matches(self, matches: dict) -> dict:
+    def sort_matches(self, matches: dict, cards: list) -> dict:
         """Sort matches dict by size of match, then by rank of match."""
         match_types = {2: "One Pair", 3: "Set", 4: "Quads"}
         hands = {
@@ -209,17 +304,17 @@ class HandCalculator:
             elif rank > temp:
                 hands[match_type] = rank
 
-        hands = self.add_kickers_to_hands(hands)
+        hands = self.add_kickers_to_hands(hands, cards)
 
         return hands
 
-    def add_kickers_to_hands(self, hands: dict) -> dict:
+    def add_kickers_to_hands(self, hands: dict, cards: list) -> dict:
         """Add kickers to hands dict."""
         # We only check against the matched ranks (ranks that are in pairs,
         # sets, or quads) because kickers are irrelevant in straights/flushes.
         matched_ranks = hands.values()
         dealt_ranks = []
-        for card in self.dealt:
+        for card in cards:
             if card.rank not in matched_ranks:
                 dealt_ranks.append(card.rank)
 
@@ -0,0 +1,202 @@
+import csv
+import mmap
+import os
+from collections import namedtuple
+
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import CARDS, Dealer
+from poker_win_calculator.monte_carlo import adaptive_equity
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# A record is one byte for the number of players, five bytes for the board,
+# then two bytes of hole cards for each of nine seats. Cards are stored as
+# their card int, and unused seats and cards that weren't dealt are NO_CARD.
+# Decoded records share the read-only Cards in CARDS.
+MAX_PLAYERS = 9
+RECORD_SIZE = 1 + 5 + 2 * MAX_PLAYERS
+NO_CARD = 0xFF
+
+# Number of board cards dealt at each street equity can be reported for.
+# Preflop equity would take enumerating every five card board, so it's
+# sampled instead (see HandHistoryReader).
+STREET_CARDS = {"Preflop": 0, "Flop": 3, "Turn": 4}
+
+HandResult = namedtuple(
+    "HandResult", ["index", "winners", "category", "highest_hands", "equity"]
+)
+
+
+class HandHistoryWriter:
+    """Appends rounds to a hand history file as fixed-width records."""
+
+    def __init__(self, path: str):
+        self.file = open(path, "ab")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, holes: list, board: list):
+        """Append a round from a list of each player's hole cards and the
+        board."""
+        if not 1 <= len(holes) <= MAX_PLAYERS:
+            raise ValueError(f"A round must have 1-{MAX_PLAYERS} players")
+        if len(board) not in (0, 3, 4, 5):
+            raise ValueError("The board must have 0, 3, 4 or 5 cards")
+        record = bytearray([NO_CARD]) * RECORD_SIZE
+        record[0] = len(holes)
+        for i, card in enumerate(board):
+            record[1 + i] = card.card_int
+        for i, hole in enumerate(holes):
+            if len(hole) != 2:
+                raise ValueError("Hole cards must be two cards per player")
+            for j, card in enumerate(hole):
+                record[6 + 2 * i + j] = card.card_int
+        self.file.write(record)
+
+    def write_round(self, dealer: Dealer):
+        """Append the round a Dealer has dealt."""
+        holes = [player.hole for player in dealer.players]
+        self.write(holes, dealer.community_cards)
+
+    def close(self):
+        self.file.close()
+
+
+class HandHistoryReader:
+    """Reads a hand history file through a read-only memory map, so records
+    are paged in by the OS as they're evaluated rather than loaded up front.
+    Records and batches are memoryview slices of the map, not copies.
+
+    Preflop equity is sampled to within a standard error of preflop_error,
+    seeded by the record's index so the results are reproducible, and the
+    equity at later streets is exact."""
+
+    def __init__(
+        self,
+        path: str,
+        ruleset: Ruleset = STANDARD,
+        preflop_error: float = 0.005,
+    ):
+        self.file = open(path, "rb")
+        size = os.fstat(self.file.fileno()).st_size
+        # An empty file can't be memory mapped
+        self.mmap = None
+        self.view = memoryview(b"")
+        if size:
+            self.mmap = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.view = memoryview(self.mmap)
+        self.evaluator = Evaluator(ruleset)
+        self.ruleset = ruleset
+        self.preflop_error = preflop_error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.view) // RECORD_SIZE
+
+    def record(self, index: int) -> memoryview:
+        """Return the record at an index."""
+        start = index * RECORD_SIZE
+        return self.view[start:start + RECORD_SIZE]
+
+    def batches(self, batch_size: int = 4096, start: int = 0, stop=None):
+        """Yield (index of first record, memoryview of records) for each batch
+        of up to batch_size records between start and stop."""
+        stop = len(self) if stop is None else min(stop, len(self))
+        for first in range(start, stop, batch_size):
+            last = min(first + batch_size, stop)
+            yield first, self.view[first * RECORD_SIZE:last * RECORD_SIZE]
+
+    def decode(self, record: memoryview) -> tuple:
+        """Return (list of each player's hole cards, board) of a record."""
+        board = [CARDS[b] for b in record[1:6] if b != NO_CARD]
+        holes = []
+        for i in range(record[0]):
+            hole = record[6 + 2 * i:8 + 2 * i]
+            holes.append([CARDS[b] for b in hole if b != NO_CARD])
+        return holes, board
+
+    def evaluate_record(self, index: int, record: memoryview, streets=()):
+        """Return the HandResult of a record, with each player's equity at
+        each of the given streets (see STREET_CARDS) the board reached."""
+        holes, board = self.decode(record)
+        winners, values = self.evaluator.showdown(holes, board)
+
+        equity = {}
+        for street in streets:
+            n = STREET_CARDS[street]
+            if len(board) < n:
+                continue
+            if n:
+                equity[street] = self.evaluator.equity(holes, board[:n])
+            else:
+                equity[street] = adaptive_equity(
+                    holes,
+                    target_error=self.preflop_error,
+                    seed=index,
+                    ruleset=self.ruleset,
+                ).equities
+
+        return HandResult(
+            index=index,
+            # Player ids start at 1, as they do in the Dealer
+            winners=[i + 1 for i in winners],
+            category=self.evaluator.category(values[winners[0]]),
+            highest_hands=[self.evaluator.category(v) for v in values],
+            equity=equity,
+        )
+
+    def evaluate(
+        self, start: int = 0, stop=None, streets=(), batch_size: int = 4096
+    ):
+        """Yield the HandResult of each record between start and stop. Results
+        are generated one at a time, so any number of records can be streamed
+        through in constant memory."""
+        for first, batch in self.batches(batch_size, start, stop):
+            for i in range(len(batch) // RECORD_SIZE):
+                record = batch[i * RECORD_SIZE:(i + 1) * RECORD_SIZE]
+                yield self.evaluate_record(first + i, record, streets)
+
+    def export_csv(self, path: str, **kwargs):
+        """Write the results of evaluate(**kwargs) to a csv file as they're
+        generated."""
+        streets = kwargs.get("streets", ())
+        with open(path, "w", newline="") as out:
+            writer = csv.writer(out)
+            writer.writerow(
+                ["index", "winners", "category", "highest_hands"]
+                + [f"{street} equity" for street in streets]
+            )
+            for result in self.evaluate(**kwargs):
+                row = [
+                    result.index,
+                    " ".join(map(str, result.winners)),
+                    result.category,
+                    ";".join(result.highest_hands),
+                ]
+                for street in streets:
+                    equity = result.equity.get(street, [])
+                    row.append(" ".join(f"{e:.4f}" for e in equity))
+                writer.writerow(row)
+
+    def close(self):
+        """Close the file. If records or batches of the map are still in
+        use, e.g. by an evaluate() generator that wasn't run to the end, the
+        map stays open until the last of them is garbage collected."""
+        try:
+            self.view.release()
+            if self.mmap:
+                self.mmap.close()
+        except BufferError:
+            pass
+        self.view = memoryview(b"")
+        self.mmap = None
+        self.file.close()
@@ -0,0 +1,244 @@
+import sqlite3
+from collections import Counter
+
+from poker_win_calculator.game_objects import Dealer
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+from poker_win_calculator.win_calculator import WinCalculator
+
+# Results of a player in a round
+WIN = "win"
+SPLIT = "split"
+LOSE = "lose"
+
+# Seeds are stored as text, since a Dealer's seeds use all 64 bits and
+# SQLite integers are signed. Players are the caller's stable identifiers,
+# not seat numbers, which only mean something within one round.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rounds (
+    id INTEGER PRIMARY KEY,
+    seed TEXT,
+    board TEXT NOT NULL,
+    players INTEGER NOT NULL,
+    category TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hands (
+    round_id INTEGER NOT NULL REFERENCES rounds(id),
+    seat INTEGER NOT NULL,
+    player TEXT NOT NULL,
+    hole TEXT NOT NULL,
+    starting_hand TEXT NOT NULL,
+    highest_hand TEXT NOT NULL,
+    result TEXT NOT NULL,
+    pot_share REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS hands_by_player ON hands (player);
+CREATE TABLE IF NOT EXISTS starting_hand_stats (
+    player TEXT NOT NULL,
+    starting_hand TEXT NOT NULL,
+    hands INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    splits INTEGER NOT NULL,
+    pot_shares REAL NOT NULL,
+    PRIMARY KEY (player, starting_hand)
+);
+CREATE TABLE IF NOT EXISTS category_stats (
+    player TEXT NOT NULL,
+    category TEXT NOT NULL,
+    hands INTEGER NOT NULL,
+    wins INTEGER NOT NULL,
+    splits INTEGER NOT NULL,
+    pot_shares REAL NOT NULL,
+    PRIMARY KEY (player, category)
+);
+"""
+
+# Adds a batch's counts to an aggregate row, creating it if it's new
+UPSERT = """
+INSERT INTO {table} (player, {key}, hands, wins, splits, pot_shares)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (player, {key}) DO UPDATE SET
+    hands = hands + excluded.hands,
+    wins = wins + excluded.wins,
+    splits = splits + excluded.splits,
+    pot_shares = pot_shares + excluded.pot_shares
+"""
+
+
+def starting_hand_class(hole: list) -> str:
+    """Return the class of a two card hole, e.g. "AKs", "T9o" or "QQ", with
+    the higher rank first and Tens written as T."""
+    high, low = sorted(hole, key=lambda card: card.rank, reverse=True)
+    names = [card.id[:-1].replace("10", "T") for card in (high, low)]
+    if high.rank == low.rank:
+        return names[0] + names[1]
+    return names[0] + names[1] + ("s" if high.suit == low.suit else "o")
+
+
+class HandHistoryStore:
+    """Stores evaluated rounds in an SQLite database, with each player's hole
+    cards, highest hand, result and share of the pot, and keeps tables of
+    results by player and starting hand class and by player and hand
+    category up to date as rounds are added.
+
+    Rounds are buffered and written batch_size at a time, each batch in one
+    transaction with executemany. The aggregate tables are updated in the
+    same transaction from the batch's counts, one upsert per key rather than
+    per row, so reports read the aggregates instead of scanning the hands."""
+
+    def __init__(
+        self,
+        path: str = "hand_history.db",
+        batch_size: int = 10000,
+        ruleset: Ruleset = STANDARD,
+    ):
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self.batch_size = batch_size
+        self.ruleset = ruleset
+        self.next_id = self.connection.execute(
+            "SELECT COALESCE(MAX(id), 0) + 1 FROM rounds").fetchone()[0]
+        self.rounds = []
+        self.hands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add_round(
+        self, players: list, board: list, player_ids: dict, seed: int = None
+    ):
+        """Add a round from its players, whose hands have been reported by a
+        HandCalculator, and the board. player_ids maps each Player.id (the
+        seat) to the stable identifier of the player in that seat, which the
+        aggregates are kept by. The winners are settled by a WinCalculator,
+        which also sets each Player.highest_hand."""
+        win_calculator = WinCalculator(players, self.ruleset)
+        winners = win_calculator.get_high_winners()
+        result = SPLIT if len(winners) > 1 else WIN
+
+        round_id = self.next_id
+        self.next_id += 1
+        self.rounds.append((
+            round_id,
+            None if seed is None else str(seed),
+            " ".join(card.id for card in board),
+            len(players),
+            win_calculator.top_ranked_hand,
+        ))
+        for player in players:
+            won = player.id in winners
+            self.hands.append((
+                round_id,
+                player.id,
+                str(player_ids[player.id]),
+                " ".join(card.id for card in player.hole),
+                starting_hand_class(player.hole),
+                player.highest_hand,
+                result if won else LOSE,
+                1 / len(winners) if won else 0.0,
+            ))
+        if len(self.rounds) >= self.batch_size:
+            self.flush()
+
+    def add_dealer(self, dealer: Dealer, player_ids: dict):
+        """Add the round a Dealer has dealt and the HandCalculator has
+        reported to its players (see add_round)."""
+        self.add_round(
+            dealer.players, dealer.community_cards, player_ids, dealer.seed)
+
+    def flush(self):
+        """Write the buffered rounds and update the aggregates in one
+        transaction. If the write fails, the transaction is rolled back and
+        the rounds stay buffered, so flush() can be retried, or the batch
+        dropped with discard()."""
+        if not self.rounds:
+            return
+        by_starting_hand = Counter()
+        by_category = Counter()
+        for hand in self.hands:
+            player, starting_hand, category = hand[2], hand[4], hand[5]
+            result, pot_share = hand[6], hand[7]
+            for counter, key in (
+                (by_starting_hand, (player, starting_hand)),
+                (by_category, (player, category)),
+            ):
+                counter[key + ("hands",)] += 1
+                counter[key + ("pot_shares",)] += pot_share
+                if result != LOSE:
+                    counter[key + (result,)] += 1
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO rounds VALUES (?, ?, ?, ?, ?)", self.rounds)
+            self.connection.executemany(
+                "INSERT INTO hands VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self.hands)
+            for table, key, counter in (
+                ("starting_hand_stats", "starting_hand", by_starting_hand),
+                ("category_stats", "category", by_category),
+            ):
+                keys = {k[:2] for k in counter}
+                self.connection.executemany(
+                    UPSERT.format(table=table, key=key),
+                    [
+                        (*k, counter[k + ("hands",)], counter[k + (WIN,)],
+                         counter[k + (SPLIT,)], counter[k + ("pot_shares",)])
+                        for k in sorted(keys)
+                    ],
+                )
+        self.rounds = []
+        self.hands = []
+
+    def discard(self):
+        """Drop the buffered rounds without writing them."""
+        self.next_id -= len(self.rounds)
+        self.rounds = []
+        self.hands = []
+
+    def aggregate(self, table: str, key: str, player=None) -> dict:
+        """Return {key: (hands, wins, splits, win rate)} from an aggregate
+        table, for one player or summed over every player. The win rate is
+        the average share of the pot won, so a three way split counts as a
+        third of a win."""
+        self.flush()
+        query = f"SELECT {key}, SUM(hands), SUM(wins), SUM(splits), "
+        query += f"SUM(pot_shares) FROM {table}"
+        args = ()
+        if player is not None:
+            query += " WHERE player = ?"
+            args = (str(player),)
+        query += f" GROUP BY {key}"
+        stats = {}
+        rows = self.connection.execute(query, args)
+        for name, hands, wins, splits, pot_shares in rows:
+            stats[name] = (hands, wins, splits, pot_shares / hands)
+        return stats
+
+    def starting_hand_stats(self, player=None) -> dict:
+        """Return the results by starting hand class, e.g. "AKs"."""
+        return self.aggregate("starting_hand_stats", "starting_hand", player)
+
+    def category_stats(self, player=None) -> dict:
+        """Return the results by highest hand category, e.g. "Flush"."""
+        return self.aggregate("category_stats", "category", player)
+
+    def player_hands(self, player, limit: int = 100) -> list:
+        """Return a player's latest hands as (round id, hole, starting hand,
+        highest hand, result, pot share) rows."""
+        self.flush()
+        return self.connection.execute(
+            "SELECT round_id, hole, starting_hand, highest_hand, result, "
+            "pot_share FROM hands WHERE player = ? "
+            "ORDER BY round_id DESC LIMIT ?",
+            (str(player), limit),
+        ).fetchall()
+
+    def close(self):
+        """Write any buffered rounds and close the database, which is closed
+        even if the write fails."""
+        try:
+            self.flush()
+        finally:
+            self.connection.close()
@@ -1,15 +1,69 @@
 import atexit
 import cursor
+import re
 import shutil
+import sys
+from functools import lru_cache
 from getkey import getkey
 
 CARD_RANK = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
 CARD_SUITS = ["C", "D", "S", "H"]
 
+# A card int is (rank - 2) * 4 + suit, so CARD_STRS[card_int] is the card's
+# name as displayed, e.g. "10C". The names are interned so Card ids and
+# parsed input share the same string objects.
+CARD_STRS = tuple(sys.intern(f"{r}{s}") for r in CARD_RANK for s in CARD_SUITS)
 
-def all_card_combos():
-    """Return a list of all possible card combinations."""
-    return [f"{r}{s}" for r in CARD_RANK for s in CARD_SUITS]
+# Spacing between cards in a hand string, e.g. "AS KD", "As,Kd" or "AsKd"
+CARD_SEPARATORS = re.compile(r"[\s,]+")
+CARD_TOKEN = re.compile(r"(?:10|[2-9TJQKA])[CDSH]", re.IGNORECASE)
+
+
+def build_card_ints() -> dict:
+    """Return a dict of every accepted spelling of a card to its card int.
+    Tens can be written "10" or "T", and ranks and suits in either case."""
+    card_ints = {}
+    for card_int, card in enumerate(CARD_STRS):
+        rank, suit = card[:-1], card[-1]
+        ranks = [rank, "T"] if rank == "10" else [rank]
+        for r in ranks:
+            for name_rank in (r, r.lower()):
+                for name_suit in (suit, suit.lower()):
+                    card_ints[name_rank + name_suit] = card_int
+    return card_ints
+
+
+CARD_INTS = build_card_ints()
+
+
+def all_card_combos() -> tuple:
+    """Return all possible card names, in card int order."""
+    return CARD_STRS
+
+
+def format_cards(card_ints: list) -> str:
+    """Return a space separated string of the names of a list of card ints."""
+    return " ".join(CARD_STRS[c] for c in card_ints)
+
+
+def parse_card(s: str) -> int:
+    """Return the card int of a single card name, e.g. "Ts", "kS" or "10S"."""
+    try:
+        return CARD_INTS[s]
+    except KeyError:
+        raise ValueError(f"Invalid card: {s!r}") from None
+
+
+@lru_cache(maxsize=4096)
+def parse_cards(s: str) -> tuple:
+    """Return a tuple of the card ints in a hand string such as "AsKd",
+    "AS KD 10H" or "as,kd,th". Repeated strings are cached."""
+    compact = CARD_SEPARATORS.sub("", s)
+    tokens = CARD_TOKEN.findall(compact)
+    # findall skips anything it can't match, so check nothing was skipped
+    if sum(map(len, tokens)) != len(compact):
+        raise ValueError(f"Invalid cards: {s!r}")
+    return tuple(CARD_INTS[token] for token in tokens)
 
 
 def all_in(items: list, container: iter) -> bool:
@@ -50,6 +104,12 @@ def none_in(items: list, container: iter) -> bool:
     return True
 
 
+def permute_suit(card_int: int, suits: tuple) -> int:
+    """Return the card int of a card with its suit relabelled, where suits[n]
+    is the new suit index of suit n."""
+    return card_int - card_int % 4 + suits[card_int % 4]
+
+
 def print_centre(s):
     """Print a string centred on the terminal screen."""
     width = shutil.get_terminal_size().columns
@@ -0,0 +1,170 @@
+"""Generates and loads a specialised evaluation kernel for each ruleset.
+
+The kernel gives the same value as WinCalculator.hand_value of
+HandCalculator.get_hands for seven cards, but as straight-line code on card
+ints: the rank counts are kept as bitmasks (ranks seen once, twice, three
+and four times), the suits as four counters packed in one int, and every
+lookup table is a default argument, so the function runs on locals only,
+with no dicts, string keys or loops. The source is generated from the
+ruleset, so the hand scores and the flush and full house order are
+constants, and compiled once when this module is imported.
+
+To read the generated source:
+
+    >>> print(generate_kernel(STANDARD))
+"""
+from functools import lru_cache
+from types import SimpleNamespace
+
+from poker_win_calculator.helpers import CARD_STRS
+from poker_win_calculator.rulesets import SHORT_DECK, STANDARD, Ruleset
+
+CARD_ARGS = "abcdefg"
+
+
+def build_rank_lists() -> tuple:
+    """Return a tuple indexed by a 13-bit rank mask holding the ranks in the
+    mask, highest first, with zeros to make at least five."""
+    table = []
+    for mask in range(1 << 13):
+        ranks = [r + 2 for r in range(12, -1, -1) if mask >> r & 1]
+        table.append(tuple(ranks + [0] * (5 - len(ranks))))
+    return tuple(table)
+
+
+def kernel_tables(ruleset: Ruleset) -> dict:
+    """Return the lookup tables the generated code uses."""
+    return {
+        # The rank bit and packed suit counter increment of each card int
+        "BIT": tuple(1 << (i >> 2) for i in range(len(CARD_STRS))),
+        "SUIT": tuple(1 << 4 * (i & 3) for i in range(len(CARD_STRS))),
+        "RANKS": build_rank_lists(),
+        "STRAIGHT": ruleset.straight_table,
+        "FLUSH": ruleset.flush_table,
+    }
+
+
+def generate_kernel(ruleset: Ruleset = STANDARD) -> str:
+    """Return the source of the kernel functions for a ruleset."""
+    rank_types = ruleset.rank_types
+    score = {rank: len(rank_types) - i for i, rank in enumerate(rank_types)}
+    tables = ", ".join(f"{name}={name}" for name in kernel_tables(ruleset))
+    args = ", ".join(CARD_ARGS)
+    lines = [
+        f"# Generated by poker_win_calculator.kernel for {ruleset.name}",
+        "def evaluate(",
+        f"    {args},",
+        f"    {tables},",
+        "):",
+        '    """Return the hand value of seven card ints."""',
+    ]
+    for card in CARD_ARGS:
+        lines.append(f"    b{card} = BIT[{card}]")
+    # Bits of the ranks seen at least once, twice, three and four times
+    lines.append("    m1 = ba")
+    lines.append("    m2 = m3 = m4 = 0")
+    for card in CARD_ARGS[1:]:
+        lines.append(f"    m4 |= m3 & b{card}")
+        lines.append(f"    m3 |= m2 & b{card}")
+        lines.append(f"    m2 |= m1 & b{card}")
+        lines.append(f"    m1 |= b{card}")
+    suits = " + ".join(f"SUIT[{card}]" for card in CARD_ARGS)
+    lines += [
+        f"    suits = {suits}",
+        "    if m4:",
+        f"        return ({score['Quads']}, RANKS[m4][0])",
+        # A nibble of five or more, plus three, sets the nibble's top bit
+        "    flush = (suits + 0x3333) & 0x8888",
+        "    if flush:",
+        "        suit = (flush.bit_length() - 4) >> 2",
+        "        fm = 0",
+    ]
+    for card in CARD_ARGS:
+        lines.append(f"        if {card} & 3 == suit:")
+        lines.append(f"            fm |= b{card}")
+    lines += [
+        "        high = STRAIGHT[fm]",
+        "        if high == 14:",
+        f"            return ({score['Royal Flush']}, 14)",
+        "        if high:",
+        f"            return ({score['Straight Flush']}, high)",
+    ]
+    flush_return = f"({score['Flush']},) + FLUSH[fm]"
+    full_house = [
+        "    if m3:",
+        "        ranks = RANKS[m3]",
+        "        top = ranks[0]",
+        "        other = m2 & ~(1 << (top - 2))",
+        "        if other:",
+        f"            return ({score['Full House']}, top, RANKS[other][0])",
+    ]
+    if ruleset.flush_beats_full_house:
+        lines.append(f"        return {flush_return}")
+        lines += full_house
+    else:
+        lines += full_house
+        lines.append("    if flush:")
+        lines.append(f"        return {flush_return}")
+    lines += [
+        "    high = STRAIGHT[m1]",
+        "    if high:",
+        f"        return ({score['Straight']}, high)",
+        "    if m3:",
+        "        kickers = RANKS[m1 & ~(1 << (top - 2))]",
+        f"        return ({score['Set']}, top, kickers[0], kickers[1])",
+        "    if m2:",
+        "        pairs = RANKS[m2]",
+        "        high = pairs[0]",
+        "        low = pairs[1]",
+        "        if low:",
+        "            pair_bits = 1 << (high - 2) | 1 << (low - 2)",
+        "            kickers = RANKS[m1 & ~pair_bits]",
+        f"            return ({score['Two Pair']}, high, low, kickers[0])",
+        "        kickers = RANKS[m1 & ~(1 << (high - 2))]",
+        f"        return ({score['One Pair']}, high, kickers[0], kickers[1],"
+        " kickers[2])",
+        "    ranks = RANKS[m1]",
+        f"    return ({score['High Card']}, ranks[0], ranks[1], ranks[2],"
+        " ranks[3], ranks[4])",
+        "",
+        "",
+        "def evaluate_cards(cards, evaluate=evaluate):",
+        '    """Return the hand value of a list of seven Cards."""',
+        f"    {args} = cards",
+        "    return evaluate(",
+        *(f"        {card}.card_int," for card in CARD_ARGS),
+        "    )",
+        "",
+        "",
+        "def showdown(holes, board, evaluate=evaluate):",
+        '    """Return the indexes of the winning holes, and every hole\'s',
+        "    hand value, for two card holes and a five card board of card",
+        '    ints."""',
+        "    c, d, e, f, g = board",
+        "    values = [evaluate(a, b, c, d, e, f, g) for a, b in holes]",
+        "    best = max(values)",
+        "    return [i for i, v in enumerate(values) if v == best], values",
+        "",
+    ]
+    return "\n".join(lines)
+
+
+@lru_cache(maxsize=None)
+def load_kernel(ruleset: Ruleset = STANDARD) -> SimpleNamespace:
+    """Compile the kernel for a ruleset and return its functions: evaluate
+    (seven card ints), evaluate_cards (seven Cards) and showdown."""
+    namespace = dict(kernel_tables(ruleset))
+    source = generate_kernel(ruleset)
+    exec(compile(source, f"<kernel {ruleset.name}>", "exec"), namespace)
+    return SimpleNamespace(
+        source=source,
+        evaluate=namespace["evaluate"],
+        evaluate_cards=namespace["evaluate_cards"],
+        showdown=namespace["showdown"],
+    )
+
+
+# Compile the kernels of the built in rulesets at import
+for _ruleset in (STANDARD, SHORT_DECK):
+    load_kernel(_ruleset)
+
@@ -0,0 +1,266 @@
+import time
+from collections import namedtuple
+from itertools import combinations
+from math import sqrt
+from random import Random
+
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import CARDS, Deck, sample_live
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# equities and std_errors are by seat: the known holes, then any random
+# opponents. evaluations counts showdowns evaluated, the cost of the estimate.
+EquityEstimate = namedtuple(
+    "EquityEstimate",
+    [
+        "equities",
+        "std_errors",
+        "trials",
+        "evaluations",
+        "elapsed",
+        "exact",
+        "converged",
+    ],
+)
+
+
+class EquitySampler:
+    """Estimates each seat's share of the pot by sampling random runouts of
+    the board, and hole cards for any random opponents, in batches.
+
+    Every trial is one showdown settled by the HandCalculator and
+    WinCalculator rules. The running sum and sum of squares of each seat's
+    share give the standard error of its equity after any batch, so sampling
+    can stop as soon as the estimate is precise enough."""
+
+    def __init__(
+        self,
+        holes: list,
+        board: list = (),
+        random_opponents: int = 0,
+        dead_cards: list = (),
+        seed: int = None,
+        ruleset: Ruleset = STANDARD,
+    ):
+        self.holes = [list(hole) for hole in holes]
+        self.board = list(board)
+        self.dead_cards = list(dead_cards)
+        self.random_opponents = random_opponents
+        self.n_seats = len(self.holes) + random_opponents
+        if not 1 <= self.n_seats <= 9:
+            raise ValueError("There must be 1-9 players")
+        self.rng = Random(seed)
+        self.evaluator = Evaluator(ruleset)
+
+        known = [card for hole in self.holes for card in hole]
+        self.deck = Deck(ruleset, known + self.board + self.dead_cards)
+        self.board_needed = 5 - len(self.board)
+        self.n_dealt = self.board_needed + 2 * random_opponents
+
+        self.trials = 0
+        self.evaluations = 0
+        self.sums = [0.0] * self.n_seats
+        self.sums_sq = [0.0] * self.n_seats
+        self.elapsed = 0.0
+
+    def deal(self, dealt: list) -> tuple:
+        """Return (holes, board) of a showdown from the card ints dealt for
+        the missing board cards, then the random opponents' holes."""
+        board = self.board + [CARDS[c] for c in dealt[:self.board_needed]]
+        holes = list(self.holes)
+        for i in range(self.board_needed, len(dealt), 2):
+            holes.append([CARDS[dealt[i]], CARDS[dealt[i + 1]]])
+        return holes, board
+
+    def shares(self, holes: list, board: list) -> list:
+        """Return each seat's share of the pot in a showdown."""
+        winners, _ = self.evaluator.showdown(holes, board)
+        self.evaluations += 1
+        shares = [0.0] * self.n_seats
+        for seat in winners:
+            shares[seat] = 1 / len(winners)
+        return shares
+
+    def trial(self) -> list:
+        """Return the shares of one trial. A trial is one random showdown."""
+        dealt = sample_live(
+            self.deck.live, self.n_dealt, self.rng, self.deck.first)
+        return self.shares(*self.deal(dealt))
+
+    def add_trial(self, shares: list):
+        """Add the shares of a trial to the running sums."""
+        self.trials += 1
+        for seat, share in enumerate(shares):
+            self.sums[seat] += share
+            self.sums_sq[seat] += share * share
+
+    def sample_batch(self, n: int, max_trials: int = None):
+        """Run trials until at least n more showdowns have been evaluated, or
+        until max_trials trials have been run in all. Batches are measured in
+        evaluations rather than trials, since a trial of some samplers
+        evaluates many showdowns."""
+        start = time.monotonic()
+        target = self.evaluations + n
+        while self.evaluations < target:
+            if max_trials is not None and self.trials >= max_trials:
+                break
+            self.add_trial(self.trial())
+        self.elapsed += time.monotonic() - start
+
+    def std_errors(self) -> list:
+        """Return the standard error of each seat's equity so far."""
+        if self.trials < 2:
+            return [1.0] * self.n_seats
+        n = self.trials
+        errors = []
+        for total, total_sq in zip(self.sums, self.sums_sq):
+            mean = total / n
+            variance = max(total_sq / n - mean * mean, 0.0) * n / (n - 1)
+            errors.append(sqrt(variance / n))
+        return errors
+
+    def estimate(self, converged: bool = False) -> EquityEstimate:
+        """Return the estimate from the trials so far."""
+        n = max(self.trials, 1)
+        return EquityEstimate(
+            equities=[total / n for total in self.sums],
+            std_errors=self.std_errors(),
+            trials=self.trials,
+            evaluations=self.evaluations,
+            elapsed=self.elapsed,
+            exact=False,
+            converged=converged,
+        )
+
+    def run(
+        self,
+        target_error: float = 0.005,
+        time_budget: float = None,
+        max_trials: int = 10000000,
+        batch_size: int = 1000,
+    ) -> EquityEstimate:
+        """Sample in batches of batch_size evaluations until every seat's
+        standard error is at most target_error, the time budget (in seconds)
+        is spent, or max_trials have been run, which is never exceeded.
+        Returns the estimate with the precision reached."""
+        deadline = None
+        if time_budget is not None:
+            deadline = time.monotonic() + time_budget
+        while True:
+            self.sample_batch(batch_size, max_trials)
+            converged = max(self.std_errors()) <= target_error
+            out_of_time = deadline and time.monotonic() >= deadline
+            if converged or out_of_time or self.trials >= max_trials:
+                return self.estimate(converged)
+
+
+class StratifiedSampler(EquitySampler):
+    """Stratifies runouts by the next board card to be dealt, e.g. the turn
+    on the flop. Each trial deals the rest of the runout once for every live
+    card as the next card, and averages the showdowns, so every trial covers
+    all the next cards in their exact proportions instead of leaving them to
+    chance."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.board_needed:
+            raise ValueError("The board is already complete")
+        self.strata = self.deck.live_ints()
+
+    def trial(self) -> list:
+        totals = [0.0] * self.n_seats
+        for card_int in self.strata:
+            live = self.deck.live & ~(1 << card_int)
+            dealt = [card_int] + sample_live(
+                live, self.n_dealt - 1, self.rng, self.deck.first)
+            for seat, share in enumerate(self.shares(*self.deal(dealt))):
+                totals[seat] += share
+        return [total / len(self.strata) for total in totals]
+
+
+class TextureSampler(EquitySampler):
+    """Stratifies preflop runouts by the texture of the flop: monotone,
+    two-tone or rainbow. The chance of each texture is calculated exactly
+    from the live cards of each suit, and each trial deals flops of every
+    texture in proportion to those chances (at least one of each), so the mix
+    of textures in the estimate is exact rather than left to chance."""
+
+    # Showdowns per trial, shared between the textures
+    trial_size = 20
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.board:
+            raise ValueError("Flop textures are stratified before the flop")
+        self.weights = self.texture_weights()
+        self.allocation = {
+            suits: max(1, round(weight * self.trial_size))
+            for suits, weight in self.weights.items()
+        }
+
+    def texture_weights(self) -> dict:
+        """Return the chance of a flop with 1, 2 or 3 suits from the deck."""
+        suit_counts = [0] * 4
+        for card_int in self.deck.live_ints():
+            suit_counts[card_int % 4] += 1
+        flops = {1: 0, 2: 0, 3: 0}
+        for a, b, c in combinations(range(4), 3):
+            flops[3] += suit_counts[a] * suit_counts[b] * suit_counts[c]
+        for n in suit_counts:
+            flops[1] += n * (n - 1) * (n - 2) // 6
+        total = len(self.deck) * (len(self.deck) - 1) * (len(self.deck) - 2)
+        total //= 6
+        flops[2] = total - flops[1] - flops[3]
+        return {suits: n / total for suits, n in flops.items() if n}
+
+    def deal_texture(self, suits: int) -> list:
+        """Return the card ints of a random deal whose flop has this many
+        suits."""
+        live, first = self.deck.live, self.deck.first
+        # Deal flops until one has this texture
+        while True:
+            flop = sample_live(live, 3, self.rng, first)
+            if len({card_int % 4 for card_int in flop}) == suits:
+                break
+        for card_int in flop:
+            live &= ~(1 << card_int)
+        return flop + sample_live(live, self.n_dealt - 3, self.rng, first)
+
+    def trial(self) -> list:
+        totals = [0.0] * self.n_seats
+        for suits, n in self.allocation.items():
+            weight = self.weights[suits] / n
+            for _ in range(n):
+                dealt = self.deal_texture(suits)
+                for seat, share in enumerate(self.shares(*self.deal(dealt))):
+                    totals[seat] += weight * share
+        return totals
+
+
+SAMPLERS = {
+    "plain": EquitySampler,
+    "stratified": StratifiedSampler,
+    "texture": TextureSampler,
+}
+
+
+def adaptive_equity(
+    holes: list,
+    board: list = (),
+    random_opponents: int = 0,
+    dead_cards: list = (),
+    target_error: float = 0.005,
+    time_budget: float = None,
+    max_trials: int = 10000000,
+    batch_size: int = 1000,
+    seed: int = None,
+    ruleset: Ruleset = STANDARD,
+    strategy: str = "plain",
+) -> EquityEstimate:
+    """Return each seat's equity, sampled until it reaches target_error or the
+    time budget runs out (see EquitySampler.run). The strategy is a key of
+    SAMPLERS."""
+    sampler = SAMPLERS[strategy](
+        holes, board, random_opponents, dead_cards=dead_cards, seed=seed,
+        ruleset=ruleset)
+    return sampler.run(target_error, time_budget, max_trials, batch_size)
@@ -0,0 +1,120 @@
+from itertools import combinations
+
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+
+class OutsReport:
+    """The runouts that change who leads a round, grouped by the player(s)
+    who weren't leading that they make a leader, and the rank type of the
+    new leading hand. A runout that makes a trailing player the only leader
+    is one of their outs; one that lets them split the pot is one of their
+    ties. Players who were already leading are never credited, as a runout
+    can only cost them some or all of the pot."""
+
+    def __init__(self, leaders: list, total: int):
+        # Ids of the player(s) leading before the runout
+        self.leaders = leaders
+        # Number of possible runouts
+        self.total = total
+        # {player_id: {rank_type: [runout, ...]}}, where a runout is a Card
+        # for the next card or a tuple of two Cards for runner-runner
+        self.outs = {}
+        # The same for runouts that make a player one of several leaders
+        self.ties = {}
+
+    def __repr__(self):
+        outs = {pid: self.count(pid) for pid in self.outs}
+        ties = {pid: self.count(pid, ties=True) for pid in self.ties}
+        return f"OutsReport(leaders={self.leaders}, outs={outs}, ties={ties})"
+
+    def add(self, winners: list, rank_type: str, runout):
+        """Record a runout that makes a new set of winners, as an out or a
+        tie for each winner who wasn't leading."""
+        runouts = self.outs if len(winners) == 1 else self.ties
+        for pid in winners:
+            if pid in self.leaders:
+                continue
+            player_runouts = runouts.setdefault(pid, {})
+            player_runouts.setdefault(rank_type, []).append(runout)
+
+    def count(
+        self, player_id: int, rank_type: str = None, ties: bool = False
+    ) -> int:
+        """Return the number of outs, or ties, a player has, optionally only
+        those that make a given rank type."""
+        player_runouts = (self.ties if ties else self.outs).get(player_id, {})
+        if rank_type:
+            return len(player_runouts.get(rank_type, []))
+        return sum(len(runouts) for runouts in player_runouts.values())
+
+    def probability(
+        self, player_id: int, rank_type: str = None, ties: bool = False
+    ) -> float:
+        """Return the chance a player hits one of their outs, or ties."""
+        return self.count(player_id, rank_type, ties) / self.total
+
+
+class OutsCalculator:
+    """Finds every card that changes the leader of a round on the flop or the
+    turn, and on the flop every runner-runner turn and river.
+
+    Each player's hole cards and the board are joined once, and each
+    candidate runout is added to those cards and the whole hand valued again
+    with Evaluator.value. The river cards on the turn and the runner-runner
+    turns and rivers on the flop make seven cards, so they go through the
+    generated kernel; the turn cards on the flop make six, so they go
+    through the HandCalculator checks."""
+
+    def __init__(
+        self,
+        players: list,
+        community_cards: list,
+        dead_cards: list = (),
+        ruleset: Ruleset = STANDARD,
+    ):
+        if len(community_cards) not in (3, 4):
+            raise ValueError("Outs are calculated on the flop or the turn")
+        self.players = players
+        self.community_cards = community_cards
+        self.evaluator = Evaluator(ruleset)
+        self.dealt = [player.hole + community_cards for player in players]
+        known = [card for player in players for card in player.hole]
+        self.remaining = self.evaluator.remaining_cards(
+            known + community_cards + list(dead_cards))
+        self.leaders, _ = self.leaders_with([])
+
+    def leaders_with(self, cards: list) -> tuple:
+        """Return the ids of the player(s) who lead if cards are added to the
+        board, and the rank type of their hand."""
+        value = self.evaluator.value
+        best, leaders = None, []
+        for player, dealt in zip(self.players, self.dealt):
+            player_value = value(dealt + cards)
+            if best is None or player_value > best:
+                best, leaders = player_value, [player.id]
+            elif player_value == best:
+                leaders.append(player.id)
+        return leaders, self.evaluator.category(best)
+
+    def next_card_outs(self) -> OutsReport:
+        """Return the outs and ties for the next card to be dealt."""
+        report = OutsReport(self.leaders, len(self.remaining))
+        for card in self.remaining:
+            leaders, rank_type = self.leaders_with([card])
+            if leaders != self.leaders:
+                report.add(leaders, rank_type, card)
+        return report
+
+    def runner_runner_outs(self) -> OutsReport:
+        """Return the outs and ties of the turn and river pairs on the
+        flop."""
+        if len(self.community_cards) != 3:
+            raise ValueError("Runner-runner outs are calculated on the flop")
+        runouts = list(combinations(self.remaining, 2))
+        report = OutsReport(self.leaders, len(runouts))
+        for runout in runouts:
+            leaders, rank_type = self.leaders_with(list(runout))
+            if leaders != self.leaders:
+                report.add(leaders, rank_type, runout)
+        return report
@@ -0,0 +1,81 @@
+import shutil
+import sys
+
+
+class Renderer:
+    """Composes a screen of the CLI as a frame of lines, then draws it with a
+    single write, rewriting only the rows that changed since the last frame.
+
+    Nothing is cleared: each changed row is overwritten in place by moving the
+    cursor to it and erasing the rest of the line, and any rows left over from
+    a longer previous frame are erased at the end. The terminal size is
+    queried once per frame, and lines wider than the terminal are split into
+    rows so the row numbers match what's on screen."""
+
+    margin = 4
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+        self.width = None
+        self.rows = []
+        self.previous = []
+
+    def begin(self):
+        """Start composing a new frame."""
+        width = shutil.get_terminal_size().columns
+        if width != self.width:
+            # Rows wrap differently at a new width, so redraw everything
+            self.width = width
+            self.invalidate()
+        self.rows = []
+
+    def invalidate(self):
+        """Make the next frame redraw every row, e.g. after something else
+        has written to the screen."""
+        self.previous = None
+
+    def add(self, s: str = ""):
+        """Add a line, or several separated by newlines, to the frame."""
+        for line in s.split("\n"):
+            if not line:
+                self.rows.append("")
+            for start in range(0, len(line), self.width):
+                self.rows.append(line[start:start + self.width])
+
+    def line_break(self):
+        """Add an empty line to the frame."""
+        self.add()
+
+    def centre(self, s: str):
+        """Add a line centred on the terminal screen."""
+        self.add(s.center(self.width).rstrip())
+
+    def lm(self, s: str):
+        """Add a line with a left margin."""
+        self.add(" " * self.margin + s)
+
+    def frame_diff(self) -> str:
+        """Return the escape codes and text that turn the previous frame into
+        this one."""
+        out = []
+        if self.previous is None:
+            # Clear once, in the same write as the redraw
+            out.append("\033[2J")
+            previous = []
+        else:
+            previous = self.previous
+        for i, row in enumerate(self.rows):
+            if i >= len(previous) or previous[i] != row:
+                out.append(f"\033[{i + 1};1H{row}\033[K")
+        if len(previous) > len(self.rows):
+            # Erase everything below the last row of this frame
+            out.append(f"\033[{len(self.rows) + 1};1H\033[J")
+        return "".join(out)
+
+    def render(self):
+        """Draw the frame with one write."""
+        out = self.frame_diff()
+        if out:
+            self.stream.write(out)
+            self.stream.flush()
+        self.previous = self.rows
@@ -0,0 +1,164 @@
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from poker_win_calculator.game_objects import CARDS, Card, Dealer, Player
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+
+# A record is the round's seed, the number of seats, the number of hole cards
+# per seat, the number of cards dealt, then the permutation index of the
+# dealt cards (see permutation_index). 29 bytes hold the index of any order
+# of a whole 52 card deck, so every record is the same width.
+INDEX_SIZE = 29
+RECORD = struct.Struct(f"<QBBB{INDEX_SIZE}s")
+RECORD_SIZE = RECORD.size
+
+LoggedRound = namedtuple(
+    "LoggedRound", ["index", "seed", "seats", "hole_size", "dealt"]
+)
+
+
+def permutation_index(sequence: list, deck: list) -> int:
+    """Return the number of an ordered sequence of distinct card ints among
+    every possible ordered sequence of that many cards from the deck. Each
+    card is numbered by its position among the cards not yet dealt."""
+    remaining = sorted(deck)
+    index = 0
+    for card_int in sequence:
+        position = remaining.index(card_int)
+        index = index * len(remaining) + position
+        del remaining[position]
+    return index
+
+
+def permutation_from_index(index: int, k: int, deck: list) -> list:
+    """Return the sequence of k card ints numbered index by
+    permutation_index."""
+    n = len(deck)
+    positions = []
+    for radix in range(n - k + 1, n + 1):
+        index, position = divmod(index, radix)
+        positions.append(position)
+    remaining = sorted(deck)
+    return [remaining.pop(position) for position in reversed(positions)]
+
+
+class RoundLogWriter:
+    """Appends dealt rounds to an append-only binary log of fixed-width
+    records. A record is only the seed and the order the cards were dealt
+    in, so millions of rounds fit in a small file."""
+
+    def __init__(self, path: str, ruleset: Ruleset = STANDARD):
+        self.file = open(path, "ab")
+        self.deck = list(range((ruleset.rank_values[0] - 2) * 4, len(CARDS)))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, seed: int, seats: int, hole_size: int, dealt: list):
+        """Append a round from its seed, its number of seats and hole cards
+        per seat, and the card ints in the order they were dealt."""
+        index = permutation_index(dealt, self.deck)
+        self.file.write(RECORD.pack(
+            seed, seats, hole_size, len(dealt),
+            index.to_bytes(INDEX_SIZE, "little"),
+        ))
+
+    def write_round(self, dealer: Dealer):
+        """Append the round a Dealer has dealt, including its burn cards."""
+        seats = len(dealer.deck.dealt) - len(dealer.community_cards)
+        seats -= len(dealer.burned)
+        self.write(
+            dealer.seed,
+            seats // dealer.hole_size,
+            dealer.hole_size,
+            dealer.deck.dealt,
+        )
+
+    def close(self):
+        self.file.close()
+
+
+class RoundLogReader:
+    """Reads any round of a round log directly by its index, through a
+    read-only memory map, without dealing the rounds before it."""
+
+    def __init__(self, path: str, ruleset: Ruleset = STANDARD):
+        self.ruleset = ruleset
+        self.deck = list(range((ruleset.rank_values[0] - 2) * 4, len(CARDS)))
+        self.file = open(path, "rb")
+        # An empty file can't be memory mapped
+        self.mmap = None
+        if os.fstat(self.file.fileno()).st_size:
+            self.mmap = mmap.mmap(
+                self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.mmap) // RECORD_SIZE if self.mmap else 0
+
+    def round(self, index: int) -> LoggedRound:
+        """Return the LoggedRound at an index."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"No round {index} in the log")
+        seed, seats, hole_size, n_dealt, raw = RECORD.unpack_from(
+            self.mmap, index * RECORD_SIZE)
+        dealt = permutation_from_index(
+            int.from_bytes(raw, "little"), n_dealt, self.deck)
+        return LoggedRound(index, seed, seats, hole_size, dealt)
+
+    def replay(self, index: int) -> Dealer:
+        """Return a Dealer holding the round at an index as it was dealt:
+        each player's hole cards, the burn cards and the board."""
+        logged = self.round(index)
+        players = [Player(i + 1) for i in range(logged.seats)]
+        dealer = Dealer(players, self.ruleset, seed=logged.seed)
+        dealer.hole_size = logged.hole_size
+        dealer.deck.remove([CARDS[card_int] for card_int in logged.dealt])
+        dealer.deck.dealt = list(logged.dealt)
+
+        dealt = iter(logged.dealt)
+        for player in players:
+            hole = []
+            for _ in range(logged.hole_size):
+                card = Card.from_int(next(dealt))
+                card.location = player.id
+                hole.append(card)
+            player.hole = sorted(hole, reverse=True)
+        # The rest of the deal is a burn card before each street
+        for street_size in (3, 1, 1):
+            burn = next(dealt, None)
+            if burn is None:
+                break
+            card = Card.from_int(burn)
+            card.location = Card.BURNED
+            dealer.burned.append(card)
+            for _ in range(street_size):
+                card = Card.from_int(next(dealt))
+                card.location = Card.BOARD
+                dealer.community_cards.append(card)
+        return dealer
+
+    def verify(self, index: int) -> bool:
+        """Deal the round at an index again from its seed and return whether
+        it matches the logged cards. Only rounds dealt in full from a Dealer
+        without dead cards or folds can be dealt again this way."""
+        logged = self.round(index)
+        players = [Player(i + 1) for i in range(logged.seats)]
+        dealer = Dealer(players, self.ruleset, seed=logged.seed)
+        dealer.deal_full_round(logged.hole_size)
+        return dealer.deck.dealt[:len(logged.dealt)] == logged.dealt
+
+    def close(self):
+        if self.mmap:
+            self.mmap.close()
+        self.file.close()
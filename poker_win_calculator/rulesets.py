@@ -0,0 +1,102 @@
+from functools import lru_cache
+
+HAND_RANKS = [
+    "Royal Flush",
+    "Straight Flush",
+    "Quads",
+    "Full House",
+    "Flush",
+    "Straight",
+    "Set",
+    "Two Pair",
+    "One Pair",
+    "High Card",
+]
+
+
+@lru_cache(maxsize=None)
+def build_straight_table(rank_values: tuple) -> tuple:
+    """Return a tuple indexed by a 13-bit rank mask (bit 0 is a Two, bit 12 an
+    Ace) holding the high card of the best straight in the mask, or 0 if there
+    is none. Built once per set of rank values and cached."""
+    straights = []
+    for i in range(len(rank_values) - 4):
+        window = rank_values[i:i + 5]
+        straights.append((window[-1], sum(1 << (r - 2) for r in window)))
+    # The Ace plays low with the four lowest ranks of the deck, e.g. A-2-3-4-5
+    # in a standard deck or A-6-7-8-9 in a short deck
+    wheel = (14,) + rank_values[:4]
+    straights.append((rank_values[3], sum(1 << (r - 2) for r in wheel)))
+    straights.sort(reverse=True)
+
+    table = []
+    for mask in range(1 << 13):
+        for high, straight in straights:
+            if mask & straight == straight:
+                table.append(high)
+                break
+        else:
+            table.append(0)
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def build_flush_table() -> tuple:
+    """Return a tuple indexed by a 13-bit rank mask of one suit holding the
+    ranks of the best five card flush in the mask, highest first, or None if
+    the mask has fewer than five ranks. The same for every deck."""
+    table = []
+    for mask in range(1 << 13):
+        ranks = [r + 2 for r in range(12, -1, -1) if mask >> r & 1]
+        table.append(tuple(ranks[:5]) if len(ranks) >= 5 else None)
+    return tuple(table)
+
+
+class Ruleset:
+    """The deck and hand ranking rules of a Holdem variant. Every variant
+    uses the four suits of helpers.CARD_SUITS."""
+
+    def __init__(
+        self,
+        name: str,
+        rank: list,
+        flush_beats_full_house: bool = False,
+    ):
+        self.name = name
+        # Rank names from lowest to highest. The Ace is always valued 14, so
+        # the lowest rank's value depends on how many ranks are in the deck.
+        self.rank = list(rank)
+        self.rank_values = list(range(15 - len(self.rank), 15))
+        self.flush_beats_full_house = flush_beats_full_house
+
+        self.rank_types = list(HAND_RANKS)
+        if flush_beats_full_house:
+            i = self.rank_types.index("Full House")
+            self.rank_types[i], self.rank_types[i + 1] = "Flush", "Full House"
+
+    def __repr__(self):
+        return f"Ruleset({self.name})"
+
+    @property
+    def straight_table(self) -> tuple:
+        """Return the cached straight lookup table for this deck."""
+        return build_straight_table(tuple(self.rank_values))
+
+    @property
+    def flush_table(self) -> tuple:
+        """Return the cached flush lookup table."""
+        return build_flush_table()
+
+
+STANDARD = Ruleset(
+    "Texas Holdem",
+    ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"],
+)
+
+# 36 card deck with the Twos through Fives removed. A-6-7-8-9 is the lowest
+# straight, and with fewer cards of each suit a flush beats a full house.
+SHORT_DECK = Ruleset(
+    "Short Deck Holdem",
+    ["6", "7", "8", "9", "10", "J", "Q", "K", "A"],
+    flush_beats_full_house=True,
+)
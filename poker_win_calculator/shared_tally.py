@@ -0,0 +1,71 @@
+from multiprocessing import shared_memory
+
+
+class SharedTally:
+    """A block of shared memory holding one slot of 64-bit counters per
+    worker process, so workers add their counts in place and the parent only
+    has to sum the slots instead of receiving pickled results.
+
+    After the slots there is one flag byte per chunk of work, which a worker
+    sets when it has added that chunk's counts. Workers attach to the block
+    with SharedTally.attach() and the name of the block."""
+
+    def __init__(
+        self,
+        n_slots: int,
+        slot_size: int,
+        n_chunks: int = 0,
+        name: str = None,
+    ):
+        self.n_slots = n_slots
+        self.slot_size = slot_size
+        self.n_chunks = n_chunks
+
+        counts_size = 8 * n_slots * slot_size
+        if name is None:
+            self.shm = shared_memory.SharedMemory(
+                create=True, size=counts_size + n_chunks)
+            # Shared memory isn't guaranteed to start zeroed on every platform
+            self.shm.buf[:counts_size + n_chunks] = bytes(
+                counts_size + n_chunks)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.counts = self.shm.buf[:counts_size].cast("q")
+        self.flags = self.shm.buf[counts_size:counts_size + n_chunks]
+
+    @classmethod
+    def attach(cls, name: str, n_slots: int, slot_size: int, n_chunks: int):
+        """Return a SharedTally for a block created by another process."""
+        return cls(n_slots, slot_size, n_chunks, name)
+
+    def add(self, slot: int, counts: list, chunk: int = None):
+        """Add a list of slot_size counts to a slot, and flag a chunk as done.
+        Only the worker that owns the slot may add to it."""
+        offset = slot * self.slot_size
+        for i, count in enumerate(counts):
+            self.counts[offset + i] += count
+        if chunk is not None:
+            self.flags[chunk] = 1
+
+    def reduce(self) -> tuple:
+        """Return the sum of all slots as a list of counts, and the set of
+        chunks flagged as done."""
+        totals = [0] * self.slot_size
+        for slot in range(self.n_slots):
+            offset = slot * self.slot_size
+            for i in range(self.slot_size):
+                totals[i] += self.counts[offset + i]
+        done = {chunk for chunk in range(self.n_chunks) if self.flags[chunk]}
+        return totals, done
+
+    def close(self):
+        """Detach this process from the shared memory."""
+        self.counts.release()
+        self.flags.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Free the shared memory. Called once, by the process that created
+        it, after every process is done with it."""
+        self.shm.unlink()
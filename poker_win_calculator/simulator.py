@@ -0,0 +1,270 @@
+import os
+from multiprocessing import Lock, Pool, Value
+from random import Random
+
+from poker_win_calculator.category_stats import CategoryStats
+from poker_win_calculator.chunked_runs import (
+    ChunkClock,
+    load_checkpoint,
+    print_progress,
+    run_settings,
+    save_checkpoint,
+    unfinished_chunks,
+)
+from poker_win_calculator.evaluator import Evaluator
+from poker_win_calculator.game_objects import CARDS, Deck, sample_live
+from poker_win_calculator.rulesets import STANDARD, Ruleset
+from poker_win_calculator.shared_tally import SharedTally
+
+# The shared tally, its lock, and this worker's slot in it, set up in each
+# worker process by init_worker()
+worker = {}
+
+
+class SimulationTally:
+    """Wins and splits by seat, and CategoryStats, for simulated hands."""
+
+    def __init__(self, n_players: int, rank_types: list):
+        self.n_players = n_players
+        self.hands = 0
+        self.seat_wins = [0] * n_players
+        self.seat_splits = [0] * n_players
+        self.stats = CategoryStats(rank_types)
+
+    def __repr__(self):
+        return f"SimulationTally({self.hands} hands)"
+
+    def merge(self, other):
+        """Add the counts of another SimulationTally to this one."""
+        self.hands += other.hands
+        for seat in range(self.n_players):
+            self.seat_wins[seat] += other.seat_wins[seat]
+            self.seat_splits[seat] += other.seat_splits[seat]
+        self.stats.merge(other.stats)
+        return self
+
+    def to_dict(self) -> dict:
+        """Return the counts as a dict that can be saved as JSON."""
+        return {
+            "n_players": self.n_players,
+            "hands": self.hands,
+            "seat_wins": self.seat_wins,
+            "seat_splits": self.seat_splits,
+            "stats": self.stats.to_dict(),
+        }
+
+    @staticmethod
+    def counts_size(n_players: int, rank_types: list) -> int:
+        """Return the length of the list made by to_counts()."""
+        n_types = len(rank_types)
+        return 1 + 2 * n_players + 3 * n_types + n_types * n_types
+
+    def to_counts(self) -> list:
+        """Return every counter as one flat list of ints: hands, seat wins,
+        seat splits, then the occurs, wins, splits and loses_to of stats."""
+        stats = self.stats
+        counts = [self.hands] + self.seat_wins + self.seat_splits
+        counts += stats.occurs + stats.wins + stats.splits
+        for row in stats.loses_to:
+            counts += row
+        return counts
+
+    @classmethod
+    def from_counts(cls, n_players: int, rank_types: list, counts: list):
+        """Return a SimulationTally from the list made by to_counts()."""
+        n, n_types = n_players, len(rank_types)
+        tally = cls(n, rank_types)
+        tally.hands = tally.stats.rounds = counts[0]
+        tally.seat_wins = counts[1:1 + n]
+        tally.seat_splits = counts[1 + n:1 + 2 * n]
+        i = 1 + 2 * n
+        stats = tally.stats
+        stats.occurs = counts[i:i + n_types]
+        stats.wins = counts[i + n_types:i + 2 * n_types]
+        stats.splits = counts[i + 2 * n_types:i + 3 * n_types]
+        i += 3 * n_types
+        stats.loses_to = [
+            counts[i + row * n_types:i + (row + 1) * n_types]
+            for row in range(n_types)
+        ]
+        return tally
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """Return a SimulationTally from the dict made by to_dict()."""
+        tally = cls(data["n_players"], data["stats"]["rank_types"])
+        tally.hands = data["hands"]
+        tally.seat_wins = list(data["seat_wins"])
+        tally.seat_splits = list(data["seat_splits"])
+        tally.stats = CategoryStats.from_dict(data["stats"])
+        return tally
+
+
+def simulate_chunk(args: tuple) -> SimulationTally:
+    """Return the tally of a chunk of full rounds.
+
+    The loop reuses one seven card list per seat and works from the Deck's
+    live-card bitmask, so no Player, Dealer or Card objects are created per
+    hand. Burn cards are skipped, as they don't change the odds of a deal."""
+    n_players, hands, seed, ruleset = args
+    rng = Random(seed)
+    value = Evaluator(ruleset).value
+    n_types = len(ruleset.rank_types)
+    deck = Deck(ruleset)
+    live, first = deck.live, deck.first
+    n_dealt = 2 * n_players + 5
+
+    tally = SimulationTally(n_players, ruleset.rank_types)
+    add_round = tally.stats.add_round
+    seat_wins, seat_splits = tally.seat_wins, tally.seat_splits
+    seats = [[None] * 7 for _ in range(n_players)]
+    values = [None] * n_players
+    categories = [0] * n_players
+
+    for _ in range(hands):
+        dealt = sample_live(live, n_dealt, rng, first)
+        board = [CARDS[card_int] for card_int in dealt[-5:]]
+        for seat in range(n_players):
+            cards = seats[seat]
+            cards[0] = CARDS[dealt[2 * seat]]
+            cards[1] = CARDS[dealt[2 * seat + 1]]
+            cards[2:] = board
+            values[seat] = value(cards)
+            categories[seat] = n_types - values[seat][0]
+
+        best = max(values)
+        winners = [seat for seat in range(n_players) if values[seat] == best]
+        if len(winners) > 1:
+            for seat in winners:
+                seat_splits[seat] += 1
+        else:
+            seat_wins[winners[0]] += 1
+        add_round(categories, winners)
+
+    tally.hands = hands
+    return tally
+
+
+def init_worker(name: str, shape: tuple, lock, next_slot):
+    """Attach a worker process to the shared tally and claim a slot."""
+    worker["tally"] = SharedTally.attach(name, *shape)
+    worker["lock"] = lock
+    with next_slot.get_lock():
+        worker["slot"] = next_slot.value
+        next_slot.value += 1
+
+
+def run_chunk(args: tuple) -> tuple:
+    """Simulate a chunk in a worker and add its counts to the worker's slot
+    of the shared tally. Returns only (chunk id, hands), so nothing larger is
+    sent back to the parent."""
+    chunk, chunk_args = args
+    tally = simulate_chunk(chunk_args)
+    with worker["lock"]:
+        worker["tally"].add(worker["slot"], tally.to_counts(), chunk)
+    return chunk, tally.hands
+
+
+class TournamentSimulator:
+    """Simulates full rounds at a table of up to nine players, in chunks spread
+    across processes.
+
+    Each chunk has its own seed (see chunked_runs), so a run gives the same
+    tally however many processes it's split over. Workers add their counts
+    to their own slot of a SharedTally, and the parent sums the slots when
+    it saves a checkpoint and at the end of the run. With a
+    checkpoint path, the tally and the finished chunks are saved to disk, and
+    a later run with the same settings resumes from it."""
+
+    def __init__(
+        self,
+        n_players: int = 9,
+        processes: int = None,
+        chunk_size: int = 20000,
+        seed: int = 0,
+        checkpoint: str = None,
+        checkpoint_interval: float = 10.0,
+        progress=print_progress,
+        ruleset: Ruleset = STANDARD,
+    ):
+        if not 1 <= n_players <= 9:
+            raise ValueError("There must be 1-9 players")
+        self.n_players = n_players
+        self.processes = processes or os.cpu_count()
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.progress = progress
+        self.ruleset = ruleset
+
+    def settings(self, hands: int) -> dict:
+        """Return the settings a checkpoint must match to be resumed."""
+        return run_settings(
+            self.chunk_size, self.seed, self.ruleset,
+            n_players=self.n_players, hands=hands)
+
+    def load_checkpoint(self, hands: int) -> tuple:
+        """Return (tally, set of finished chunks) from the checkpoint, or an
+        empty tally if there is no checkpoint to resume."""
+        state, _ = load_checkpoint(self.checkpoint, self.settings(hands))
+        if state is None:
+            tally = SimulationTally(self.n_players, self.ruleset.rank_types)
+            return tally, set()
+        return SimulationTally.from_dict(state["tally"]), state["done"]
+
+    def save_checkpoint(self, hands: int, tally: SimulationTally, done: set):
+        """Save the tally and the finished chunks (see save_checkpoint)."""
+        save_checkpoint(
+            self.checkpoint, self.settings(hands), done,
+            {"tally": tally.to_dict()})
+
+    def chunks(self, hands: int, done: set) -> list:
+        """Return the arguments for each chunk that hasn't been finished."""
+        return [
+            (i, (self.n_players, chunk_hands, seed, self.ruleset))
+            for i, chunk_hands, seed in unfinished_chunks(
+                hands, self.chunk_size, self.seed, done)
+        ]
+
+    def run(self, hands: int) -> SimulationTally:
+        """Simulate a number of hands and return the tally."""
+        rank_types = self.ruleset.rank_types
+        resumed, resumed_done = self.load_checkpoint(hands)
+        chunks = self.chunks(hands, resumed_done)
+        n_chunks = len(range(0, hands, self.chunk_size))
+        shape = (
+            self.processes,
+            SimulationTally.counts_size(self.n_players, rank_types),
+            n_chunks,
+        )
+        shared = SharedTally(*shape)
+        lock = Lock()
+
+        def snapshot() -> tuple:
+            """Return the resumed tally plus the counts of finished chunks."""
+            with lock:
+                counts, done = shared.reduce()
+            tally = SimulationTally.from_counts(
+                self.n_players, rank_types, counts)
+            return tally.merge(resumed), done | resumed_done
+
+        hands_done = resumed.hands
+        clock = ChunkClock(
+            hands, hands_done, self.checkpoint_interval, self.progress)
+        try:
+            initargs = (shared.name, shape, lock, Value("i", 0))
+            with Pool(self.processes, init_worker, initargs) as pool:
+                for _, chunk_hands in pool.imap_unordered(run_chunk, chunks):
+                    hands_done += chunk_hands
+                    save_due = clock.update(hands_done)
+                    if self.checkpoint and save_due:
+                        self.save_checkpoint(hands, *snapshot())
+
+            tally, done = snapshot()
+            if self.checkpoint:
+                self.save_checkpoint(hands, tally, done)
+        finally:
+            shared.close()
+            shared.unlink()
+        return tally
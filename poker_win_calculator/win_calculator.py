@@ -1,20 +1,10 @@
 from poker_win_calculator.helpers import line_break
+from poker_win_calculator.rulesets import STANDARD, Ruleset
 
 
 class WinCalculator:
 
-    rank_types = [
-        "Royal Flush",
-        "Straight Flush",
-        "Quads",
-        "Full House",
-        "Flush",
-        "Straight",
-        "Set",
-        "Two Pair",
-        "One Pair",
-        "High Card",
-    ]
+    rank_types = STANDARD.rank_types
 
     card_ranks = [
         "2",
@@ -32,8 +22,12 @@ class WinCalculator:
         "Ace",
     ]
 
-    def __init__(self, players: list):
+    def __init__(self, players: list, ruleset: Ruleset = STANDARD):
         self.players = players
+        # Players are looked up by id, since folded players leave gaps
+        self.players_by_id = {player.id: player for player in players}
+        # Short Deck and other variants may rank hands in a different order
+        self.rank_types = ruleset.rank_types
         self.hands = sorted([(player.id, player.hands) for player in players])
 
         self.top_hands, self.top_ranked_hand = self.get_top_hands(self.hands)
@@ -51,6 +45,64 @@ class WinCalculator:
         """Returns the results of the round."""
         return self.win_results
 
+    def get_low_results(self) -> str:
+        """Returns the results of the low half of a hi/lo round."""
+        winners = [(pid, None) for pid in self.get_low_winners()]
+        if not winners:
+            return "No qualifying low"
+        if len(winners) > 1:
+            msg = self.split_pot_msg(winners)
+        else:
+            msg = self.announce_winner(winners)
+        low = self.players_by_id[winners[0][0]].low_hand
+        low_name = "-".join("A" if r == 1 else str(r) for r in low)
+        return f"{msg}\n{low_name} low"
+
+    @classmethod
+    def hand_value(cls, hands: dict, rank_types: list = None) -> tuple:
+        """Returns a value for a player's hands dict that sorts higher for a
+        better hand: the hand's place in rank_types, then the dict's values,
+        which the HandCalculator stores in tie breaking order."""
+        rank_types = rank_types or cls.rank_types
+        for i, rank in enumerate(rank_types):
+            if rank in hands:
+                return (len(rank_types) - i,) + tuple(hands.values())
+
+    def get_high_winners(self) -> list:
+        """Returns the ids of the player(s) with the best high hand."""
+        values = {
+            pid: self.hand_value(pdata, self.rank_types)
+            for pid, pdata in self.hands
+        }
+        best = max(values.values())
+        return [pid for pid, value in values.items() if value == best]
+
+    def get_low_winners(self) -> list:
+        """Returns the ids of the player(s) with the best qualifying low, or an
+        empty list if no player qualifies."""
+        lows = [(p.id, p.low_hand) for p in self.players if p.low_hand]
+        if not lows:
+            return []
+        best = min(low for _, low in lows)
+        return [pid for pid, low in lows if low == best]
+
+    def split_pot(self, pot: float) -> dict:
+        """Returns each player's share of a hi/lo pot by player id.
+
+        Half the pot goes to the best high hand and half to the best
+        qualifying low, each half split between tied players, so a player can
+        be quartered. If no low qualifies the high hand scoops the pot."""
+        shares = {player.id: 0 for player in self.players}
+        high_winners = self.get_high_winners()
+        low_winners = self.get_low_winners()
+
+        high_pot = pot / 2 if low_winners else pot
+        for pid in high_winners:
+            shares[pid] += high_pot / len(high_winners)
+        for pid in low_winners:
+            shares[pid] += (pot - high_pot) / len(low_winners)
+        return shares
+
     def print_all_player_hands(self):
         """Prints all player's hands from the round."""
         for pid, pdata in self.top_hands:
@@ -62,7 +114,7 @@ class WinCalculator:
     # TODO: Implement in future versions
     def designate_player_win_status(self, player_id):
         """Designates whether a player won in a hand, including split pots."""
-        self.players[player_id - 1].is_winner = True
+        self.players_by_id[player_id].is_winner = True
 
     def get_card_name(self, card_rank: int) -> str:
         """Converts a card's rank by int to its corresponding str.
@@ -73,7 +125,7 @@ class WinCalculator:
         """Returns a list of the top hands and the top ranked hand."""
         def set_player_highest_hand(player_id: int, hand_rank: str):
             """Sets the highest hand for a player."""
-            self.players[player_id - 1].highest_hand = hand_rank
+            self.players_by_id[player_id].highest_hand = hand_rank
 
         temp_rank_data = {rank: [] for rank in self.rank_types}
 
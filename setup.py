@@ -8,7 +8,7 @@ setup(
     url="https://github.com/al-ce/poker-win-calculator",
     install_requires=INSTALL_REQUIRES,
     # packages=["poker_win_calculator"],
-    python_requires=">=3.6",
+    python_requires=">=3.8",
     # setup.py is in the root directory of the project, but cli.py is in the
     # poker_win_calculator directory. So we need to specify the directory
     # containing cli.py